@@ -0,0 +1,98 @@
+"""
+Synthetic recipient files for the benchmarks. Every generator takes a `seed`, so the same
+arguments always give the same file.
+"""
+import random
+
+LOCAL_PHONE_NUMBERS = ['650253{:04d}', '+1 650 253 {:04d}', '(202) 555-{:04d}', '1-202-555-{:04d}']
+INTERNATIONAL_PHONE_NUMBERS = ['+4479009{:05d}', '+3361234{:04d}', '+6141234{:04d}', '+49 151 2345 {:04d}']
+BAD_PHONE_NUMBERS = ['12345', '+1 650', 'not a number', '']
+
+EMAIL_DOMAINS = ['example.com', 'test.example.org', 'gov.example.ca', 'mail.example.co.uk']
+BAD_EMAIL_ADDRESSES = ['not an email', 'test@example', 'test@@example.com', '']
+
+TOWNS = ['Toronto', 'Ottawa', 'Halifax', 'Regina', 'Victoria']
+
+KINDS = ('email', 'sms', 'sms-international', 'letter')
+VARIANTS = ('clean', 'error-heavy', 'duplicate-headers')
+
+
+def recipient_file(kind, rows, variant='clean', seed=0):
+    """
+    A CSV file of `rows` recipients for `kind`, one of `KINDS`. The `error-heavy` variant has a bad
+    recipient or missing data in about half of its rows; the `duplicate-headers` variant repeats a
+    placeholder column so that its values are collected into lists.
+    """
+    rng = random.Random(seed)
+    error_rate = 0.5 if variant == 'error-heavy' else 0
+    headers, make_row = {
+        'email': (['email address', 'name', 'reference'], _email_row),
+        'sms': (['phone number', 'name', 'reference'], _sms_row),
+        'sms-international': (['phone number', 'name', 'reference'], _international_sms_row),
+        'letter': (
+            ['address line 1', 'address line 2', 'address line 3', 'postcode', 'name', 'reference'],
+            _letter_row,
+        ),
+    }[kind]
+    if variant == 'duplicate-headers':
+        headers = headers + ['Reference', 'reference']
+
+    lines = [','.join(headers)]
+    for index in range(rows):
+        bad = rng.random() < error_rate
+        row = make_row(rng, index, bad)
+        if variant == 'duplicate-headers':
+            row += ['ref-{}-b'.format(index), 'ref-{}-c'.format(index)]
+        lines.append(','.join(row))
+    return '\n'.join(lines)
+
+
+def phone_numbers(count, international=False, seed=0):
+    rng = random.Random(seed)
+    formats = INTERNATIONAL_PHONE_NUMBERS if international else LOCAL_PHONE_NUMBERS
+    return [rng.choice(formats).format(rng.randrange(10000)) for _ in range(count)]
+
+
+def email_addresses(count, seed=0):
+    rng = random.Random(seed)
+    return [_email_address(rng, index) for index in range(count)]
+
+
+def _email_address(rng, index):
+    return 'person.{}+{}@{}'.format(index, rng.randrange(100), rng.choice(EMAIL_DOMAINS))
+
+
+def _email_row(rng, index, bad):
+    recipient = rng.choice(BAD_EMAIL_ADDRESSES) if bad else _email_address(rng, index)
+    return [recipient, _name(rng, bad), 'ref-{}'.format(index)]
+
+
+def _sms_row(rng, index, bad):
+    recipient = rng.choice(BAD_PHONE_NUMBERS) if bad else rng.choice(LOCAL_PHONE_NUMBERS).format(index % 10000)
+    return [recipient, _name(rng, bad), 'ref-{}'.format(index)]
+
+
+def _international_sms_row(rng, index, bad):
+    recipient = (
+        rng.choice(BAD_PHONE_NUMBERS) if bad
+        else rng.choice(INTERNATIONAL_PHONE_NUMBERS + LOCAL_PHONE_NUMBERS).format(index % 10000)
+    )
+    return [recipient, _name(rng, bad), 'ref-{}'.format(index)]
+
+
+def _letter_row(rng, index, bad):
+    postcode = '' if bad else 'K1A 0B{}'.format(index % 10)
+    return [
+        'Person {}'.format(index),
+        '{} Main Street'.format(rng.randrange(1, 999)),
+        rng.choice(TOWNS),
+        postcode,
+        _name(rng, bad),
+        'ref-{}'.format(index),
+    ]
+
+
+def _name(rng, bad):
+    if bad and rng.random() < 0.5:
+        return ''
+    return rng.choice(['Jo', 'Alex', 'Sam', 'Chris', 'Robin'])
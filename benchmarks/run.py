@@ -0,0 +1,202 @@
+"""
+Benchmarks for validating recipient files.
+
+Run from the root of the repository, with no network access needed:
+
+    python benchmarks/run.py
+    python benchmarks/run.py --sizes 1000 10000 --only sms --json results.json
+
+Each benchmark is timed on its own (best of `--repeat` runs) and then run once more with
+`tracemalloc` to find its peak memory. Compare the numbers from two commits on the same machine
+rather than against numbers from anywhere else.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generators import KINDS, VARIANTS, email_addresses, phone_numbers, recipient_file  # noqa: E402
+
+from notifications_utils.columns import Row  # noqa: E402
+from notifications_utils.recipients import (  # noqa: E402
+    RecipientCSV,
+    estimate_sms_billing,
+    validate_email_address,
+    validate_email_addresses,
+    validate_phone_number,
+)
+from notifications_utils.template import (  # noqa: E402
+    PlainTextEmailTemplate,
+    SMSMessageTemplate,
+)
+
+DEFAULT_SIZES = (1000, 10000, 50000)
+
+Benchmark = namedtuple('Benchmark', ['name', 'rows', 'setup', 'run'])
+Result = namedtuple('Result', ['name', 'rows', 'seconds', 'rows_per_second', 'peak_memory'])
+
+
+def recipient_csv_benchmarks(sizes):
+    for kind in KINDS:
+        for variant in VARIANTS:
+            for size in sizes:
+                yield Benchmark(
+                    'RecipientCSV {} {}'.format(kind, variant),
+                    size,
+                    lambda kind=kind, variant=variant, size=size: recipient_file(kind, size, variant),
+                    lambda file_data, kind=kind: _validate_file(file_data, kind),
+                )
+
+
+def function_benchmarks(sizes):
+    size = max(sizes)
+    yield Benchmark(
+        'validate_phone_number local', size,
+        lambda: phone_numbers(size),
+        lambda numbers: [validate_phone_number(number) for number in numbers],
+    )
+    yield Benchmark(
+        'validate_phone_number international', size,
+        lambda: phone_numbers(size, international=True),
+        lambda numbers: [validate_phone_number(number, international=True) for number in numbers],
+    )
+    yield Benchmark(
+        'validate_email_address', size,
+        lambda: email_addresses(size),
+        lambda addresses: [validate_email_address(address) for address in addresses],
+    )
+    yield Benchmark(
+        'validate_email_addresses', size,
+        lambda: email_addresses(size),
+        validate_email_addresses,
+    )
+    yield Benchmark(
+        'estimate_sms_billing', size,
+        lambda: _billing_columns(size),
+        lambda columns_and_numbers: estimate_sms_billing(_template('sms').compiled_content, *columns_and_numbers),
+    )
+    yield Benchmark(
+        'Row construction', size,
+        lambda: _row_dicts(size),
+        _make_rows,
+    )
+
+
+def _validate_file(file_data, kind):
+    template_type = 'sms' if kind.startswith('sms') else kind
+    recipients = RecipientCSV(
+        file_data,
+        template_type=template_type,
+        placeholders=['name', 'reference'],
+        template=_template(template_type),
+        international_sms=kind == 'sms-international',
+        max_rows=max(DEFAULT_SIZES),
+    )
+    recipients.has_errors
+    recipients.allowed_to_send_to
+    list(recipients.displayed_rows)
+    return recipients
+
+
+def _template(template_type):
+    if template_type == 'sms':
+        return SMSMessageTemplate({'content': 'Hello ((name)), your reference is ((reference))'})
+    if template_type == 'email':
+        return PlainTextEmailTemplate({
+            'content': 'Hello ((name)), your reference is ((reference))',
+            'subject': 'Reference ((reference))',
+        })
+    return None
+
+
+def _row_dicts(size):
+    recipients = RecipientCSV(
+        recipient_file('sms', size), template_type='sms', placeholders=['name', 'reference'], max_rows=size,
+    )
+    return recipients, [dict(zip(row.keys(), (cell.data for cell in row.values()))) for row in recipients.rows]
+
+
+def _billing_columns(size):
+    numbers = [
+        validate_phone_number(number, international=True)
+        for number in phone_numbers(size // 2) + phone_numbers(size - size // 2, international=True)
+    ]
+    columns = {
+        'name': [('Jo', 'Sam Smith', 'Alex')[index % 3] for index in range(size)],
+        'reference': ['ref-{}'.format(index) for index in range(size)],
+    }
+    return columns, numbers
+
+
+def _make_rows(recipients_and_row_dicts):
+    recipients, row_dicts = recipients_and_row_dicts
+    template = _template('sms')
+    return [
+        Row(
+            row_dict,
+            index=index,
+            error_fn=recipients._get_error_for_field,
+            recipient_column_headers=recipients.recipient_column_headers,
+            placeholders=recipients.placeholder_keys,
+            template=template,
+        )
+        for index, row_dict in enumerate(row_dicts)
+    ]
+
+
+def measure(benchmark, repeat):
+    data = benchmark.setup()
+    seconds = min(_time(benchmark.run, data) for _ in range(repeat))
+
+    tracemalloc.start()
+    try:
+        benchmark.run(data)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return Result(benchmark.name, benchmark.rows, seconds, benchmark.rows / seconds, peak_memory)
+
+
+def _time(function, data):
+    start = time.perf_counter()
+    function(data)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='numbers of rows to generate')
+    parser.add_argument('--only', help='only run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs of each benchmark')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    benchmarks = [
+        benchmark
+        for group in (recipient_csv_benchmarks, function_benchmarks)
+        for benchmark in group(args.sizes)
+        if not args.only or args.only in benchmark.name
+    ]
+
+    sys.stdout.write('{:<50} {:>8} {:>12} {:>14}\n'.format('benchmark', 'rows', 'rows/sec', 'peak memory'))
+    results = []
+    for benchmark in benchmarks:
+        result = measure(benchmark, args.repeat)
+        results.append(result)
+        sys.stdout.write('{:<50} {:>8} {:>12,.0f} {:>11.1f} MiB\n'.format(
+            result.name, result.rows, result.rows_per_second, result.peak_memory / 2 ** 20,
+        ))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump([result._asdict() for result in results], f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
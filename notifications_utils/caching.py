@@ -0,0 +1,59 @@
+from threading import RLock
+
+from cachetools import LRUCache, TTLCache
+
+
+class InstrumentedCache():
+    # a bounded, thread-safe LRU cache which counts its hits and misses for `report_stats`
+
+    def __init__(self, name, maxsize, ttl=None):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = RLock()
+        self.configure(maxsize, ttl)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def configure(self, maxsize, ttl=None):
+        # empties the cache
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._cache = TTLCache(maxsize, ttl) if ttl else LRUCache(maxsize)
+
+    def get_or_set(self, key, get_value):
+        with self._lock:
+            try:
+                value = self._cache[key]
+            except KeyError:
+                pass
+            else:
+                self.hits += 1
+                return value
+        value = get_value(key)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = value
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def report_stats(self, statsd_client):
+        with self._lock:
+            hits, misses, size = self.hits, self.misses, len(self._cache)
+            self.hits = self.misses = 0
+        statsd_client.incr('{}.hit'.format(self.name), hits)
+        statsd_client.incr('{}.miss'.format(self.name), misses)
+        statsd_client.gauge('{}.size'.format(self.name), size)
@@ -1,5 +1,10 @@
-from collections import OrderedDict
+import json
+
+from collections.abc import Mapping
 from functools import lru_cache
+from hashlib import blake2b
+
+from notifications_utils.translation_table import TranslationTable
 
 
 class Columns(dict):
@@ -17,10 +22,11 @@ class Columns(dict):
         return super().get(Columns.make_key(key))
 
     def __contains__(self, key):
-        return Columns.make_key(key) in super().copy()
+        return super().__contains__(Columns.make_key(key))
 
     def get(self, key, default=None):
-        return self[key] if self[key] is not None else default
+        value = super().get(Columns.make_key(key))
+        return value if value is not None else default
 
     def copy(self):
         return Columns(super().copy())
@@ -31,18 +37,68 @@ class Columns(dict):
         }
 
     @staticmethod
-    @lru_cache(maxsize=32, typed=False)
+    @lru_cache(maxsize=1024, typed=False)
     def make_key(original_key):
         if original_key is None:
             return None
-        return "".join(
-            character.lower() for character in original_key if character not in ' _-'
-        )
+        return original_key.translate(column_key_translation)
+
+
+def _column_key_character(character):
+    return '' if character in ' _-' else character.lower()
 
 
-class Row(Columns):
+# lowercases each character on its own, rather than the whole key, so that letters like Σ don't
+# change depending on where they are in the key
+column_key_translation = TranslationTable(_column_key_character)
 
-    message_too_long = False
+
+def row_content_hash(keys, values, salt=''):
+    # the same in every process, unlike `hash`
+    return blake2b(
+        json.dumps([salt, keys, values]).encode('utf-8'),
+        digest_size=16,
+    ).hexdigest()
+
+
+class RowSchema():
+    # the column names shared by every row of a file, so each `Row` only stores values and errors
+
+    __slots__ = ('keys', 'normalised_keys', 'positions', '_lookups')
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.normalised_keys = tuple(Columns.make_key(key) for key in keys)
+        self.positions = {
+            key: position for position, key in enumerate(self.normalised_keys)
+        }
+        self._lookups = {}
+
+    def position(self, key):
+        # each way of writing a key is only normalised once for each schema
+        try:
+            return self._lookups[key]
+        except KeyError:
+            position = self._lookups[key] = self.positions.get(Columns.make_key(key))
+            return position
+
+    @staticmethod
+    @lru_cache(maxsize=32, typed=False)
+    def from_keys(keys):
+        return RowSchema(keys)
+
+
+class Row(Mapping):
+
+    __slots__ = (
+        'index',
+        'recipient_column_headers',
+        'placeholders',
+        'message_too_long',
+        '_schema',
+        '_values',
+        '_errors',
+    )
 
     def __init__(
         self,
@@ -57,29 +113,89 @@ class Row(Columns):
         self.index = index
         self.recipient_column_headers = recipient_column_headers
         self.placeholders = placeholders
+        self.message_too_long = False
 
         if template:
-            template.values = row_dict
-            self.message_too_long = template.is_message_too_long()
+            self.message_too_long = template.is_message_too_long_for(row_dict)
 
-        super().__init__(OrderedDict(
-            (key, Cell(key, value, error_fn, self.placeholders))
-            for key, value in row_dict.items()
-        ))
+        self._schema = RowSchema.from_keys(tuple(row_dict))
+        self._values = tuple(row_dict.values())
+        self._errors = None
+
+        if error_fn:
+            for position, (key, value) in enumerate(row_dict.items()):
+                error = error_fn(key, value)
+                if error is not None:
+                    if self._errors is None:
+                        self._errors = {}
+                    self._errors[position] = error
+
+    @classmethod
+    def from_validation_result(
+        cls,
+        row_dict,
+        index,
+        validation_result,
+        recipient_column_headers,
+        placeholders,
+    ):
+        errors, message_too_long = validation_result
+        row = cls.__new__(cls)
+        row.index = index
+        row.recipient_column_headers = recipient_column_headers
+        row.placeholders = placeholders
+        row.message_too_long = message_too_long
+        row._schema = RowSchema.from_keys(tuple(row_dict))
+        row._values = tuple(row_dict.values())
+        row._errors = dict(errors) if errors else None
+        return row
+
+    @property
+    def validation_result(self):
+        return dict(self._errors or {}), self.message_too_long
+
+    def content_hash(self, salt=''):
+        return row_content_hash(self._schema.keys, self._values, salt)
 
     def __getitem__(self, key):
-        return super().__getitem__(key) or Cell()
+        position = self._schema.position(key)
+        if position is None:
+            return Cell()
+        return self._cell(position)
+
+    def __contains__(self, key):
+        return self._schema.position(key) is not None
+
+    def __iter__(self):
+        return iter(self._schema.positions)
+
+    def __len__(self):
+        return len(self._schema.positions)
 
     def get(self, key, default=None):
-        if self[key] == Cell() and default is not None:
+        cell = self[key]
+        if default is not None and cell == Cell():
             return default
-        return self[key]
+        return cell
+
+    def _cell(self, position):
+        return Cell.from_parts(
+            self._values[position],
+            self._error(position),
+            self._schema.normalised_keys[position] not in (self.placeholders or []),
+        )
+
+    def _error(self, position):
+        return self._errors.get(position) if self._errors else None
+
+    def _live_errors(self):
+        if not self._errors:
+            return []
+        return [self._errors.get(position) for position in self._schema.positions.values()]
 
     @property
     def has_error(self):
-        return self.message_too_long or any(
-            cell.error for cell in self.values()
-        )
+        return self.message_too_long or any(self._live_errors())
 
     @property
     def has_bad_recipient(self):
@@ -90,10 +206,7 @@ class Row(Columns):
 
     @property
     def has_missing_data(self):
-        return any(
-            cell.error == Cell.missing_field_error
-            for cell in self.values()
-        )
+        return Cell.missing_field_error in self._live_errors()
 
     @property
     def recipient(self):
@@ -105,19 +218,21 @@ class Row(Columns):
     @property
     def personalisation(self):
         return Columns({
-            key: cell.data for key, cell in self.items()
+            key: self._values[position] for key, position in self._schema.positions.items()
             if key in self.placeholders
         })
 
     @property
     def recipient_and_personalisation(self):
         return Columns({
-            key: cell.data for key, cell in self.items()
+            key: self._values[position] for key, position in self._schema.positions.items()
         })
 
 
 class Cell():
 
+    __slots__ = ('data', 'error', 'ignore')
+
     missing_field_error = 'Missing'
 
     def __init__(
@@ -131,6 +246,14 @@ class Cell():
         self.error = error_fn(key, value) if error_fn else None
         self.ignore = Columns.make_key(key) not in (placeholders or [])
 
+    @classmethod
+    def from_parts(cls, data, error, ignore):
+        cell = cls.__new__(cls)
+        cell.data = data
+        cell.error = error
+        cell.ignore = ignore
+        return cell
+
     def __eq__(self, other):
         if not other.__class__ == self.__class__:
             return False
@@ -3,6 +3,7 @@ import re
 from orderedset import OrderedSet
 from flask import Markup
 
+from notifications_utils.caching import InstrumentedCache
 from notifications_utils.columns import Columns
 from notifications_utils.formatters import (
     unescaped_formatted_list,
@@ -97,9 +98,18 @@ class Field:
     def values(self, value):
         self._values = Columns(value) if value else {}
 
+    @property
+    def segments(self):
+        # the sanitised content split into strings and `Placeholder`s
+        return segments_cache.get_or_set(
+            (self.sanitizer, self.content),
+            lambda key: tokenise(self.sanitizer(self.content)),
+        )
+
     def format_match(self, match):
-        placeholder = Placeholder.from_match(match)
+        return self.format_placeholder(Placeholder.from_match(match))
 
+    def format_placeholder(self, placeholder):
         if self.redact_missing_personalisation:
             return self.placeholder_tag_redacted
 
@@ -114,20 +124,24 @@ class Field:
         )
 
     def replace_match(self, match):
-        placeholder = Placeholder.from_match(match)
+        return self.replace_placeholder(Placeholder.from_match(match))
+
+    def replace_placeholder(self, placeholder):
         replacement = self.values.get(placeholder.name)
 
         if placeholder.is_conditional() and replacement is not None:
             return placeholder.get_conditional_body(replacement)
 
-        replaced_value = self.get_replacement(placeholder)
+        replaced_value = self._get_replacement(replacement)
         if replaced_value is not None:
-            return self.get_replacement(placeholder)
+            return replaced_value
 
-        return self.format_match(match)
+        return self.format_placeholder(placeholder)
 
     def get_replacement(self, placeholder):
-        replacement = self.values.get(placeholder.name)
+        return self._get_replacement(self.values.get(placeholder.name))
+
+    def _get_replacement(self, replacement):
         if replacement is None:
             return None
 
@@ -148,8 +162,9 @@ class Field:
 
     @property
     def _raw_formatted(self):
-        return re.sub(
-            self.placeholder_pattern, self.format_match, self.sanitizer(self.content)
+        return ''.join(
+            segment if isinstance(segment, str) else self.format_placeholder(segment)
+            for segment in self.segments
         )
 
     @property
@@ -158,19 +173,45 @@ class Field:
 
     @property
     def placeholders(self):
-        return OrderedSet(
-            Placeholder(body).name for body in re.findall(
-                self.placeholder_pattern, self.content
-            )
-        )
+        return get_placeholders(self.content)
 
     @property
     def replaced(self):
-        return re.sub(
-            self.placeholder_pattern, self.replace_match, self.sanitizer(self.content)
+        return ''.join(
+            segment if isinstance(segment, str) else self.replace_placeholder(segment)
+            for segment in self.segments
         )
 
 
+segments_cache = InstrumentedCache('field-segments', maxsize=1024)
+placeholders_cache = InstrumentedCache('field-placeholders', maxsize=1024)
+
+
+def get_placeholders(*contents):
+    return OrderedSet(placeholders_cache.get_or_set(contents, _find_placeholders))
+
+
+def _find_placeholders(contents):
+    return tuple(OrderedSet(
+        Placeholder(body).name
+        for content in contents
+        for body in re.findall(Field.placeholder_pattern, content)
+    ))
+
+
+def tokenise(content):
+    segments = []
+    start = 0
+    for match in Field.placeholder_pattern.finditer(content):
+        if match.start() > start:
+            segments.append(content[start:match.start()])
+        segments.append(Placeholder.from_match(match))
+        start = match.end()
+    if start < len(content):
+        segments.append(content[start:])
+    return tuple(segments)
+
+
 def str2bool(value):
     if not value:
         return False
@@ -66,6 +66,10 @@ whitespace_before_punctuation = re.compile(r'[ \t]+([,\.])')
 
 hyphens_surrounded_by_spaces = re.compile(r'\s+[-–—]{1,3}\s+')
 
+# `hyphens_surrounded_by_spaces`, or anything `email_with_smart_quotes_regex` would match, without
+# the whitespace around it
+hyphens_or_email_address = re.compile(r'(\s+[-–—]{1,3}\s+)|(?<!\S)\S+@\S+(?!\S)')
+
 multiple_newlines = re.compile(r'((\n)\2{2,})')
 
 MAGIC_SEQUENCE = "🇬🇧🐦✉️"
@@ -265,6 +269,25 @@ def remove_smart_quotes_from_email_addresses(value):
     )
 
 
+def replace_hyphens_and_remove_smart_quotes_from_email_addresses(value):
+    # the same as `remove_smart_quotes_from_email_addresses` then `replace_hyphens_with_en_dashes`,
+    # in one pass
+    previous_email_end = None
+
+    def replace(match):
+        nonlocal previous_email_end
+        if match.group(1):
+            return ' \u2013 '
+        # `email_with_smart_quotes_regex` takes the whitespace after an email address as part of
+        # its match, so it doesn't match the next one if there's only a space or tab between them
+        if match.start() - 1 == previous_email_end and value[previous_email_end] != '\n':
+            return match.group(0)
+        previous_email_end = match.end()
+        return match.group(0).replace('‘', "'").replace('’', "'")
+
+    return hyphens_or_email_address.sub(replace, value)
+
+
 def strip_whitespace(value, extra_characters=''):
     if value is not None and hasattr(value, 'strip'):
         return value.strip(string.whitespace + OBSCURE_WHITESPACE + extra_characters)
@@ -563,3 +586,40 @@ notify_letter_preview_markdown = mistune.Markdown(
     hard_wrap=True,
     use_xhtml=False,
 )
+
+
+class ParsedMarkdown():
+    # block tokens which can be rendered by more than one of the instances above without lexing the
+    # text again. Inline markdown is still parsed by each renderer
+
+    def __init__(self, text):
+        block = mistune.BlockLexer(mistune.BlockGrammar())
+        self.tokens = block(mistune.preprocessing(text))
+        self.def_links = block.def_links
+        self.def_footnotes = block.def_footnotes
+
+    def render(self, markdown):
+        # follows `mistune.Markdown.parse`, using these tokens instead of lexing the text again
+        footnote_keys = dict(self.def_footnotes)
+        markdown.tokens = list(reversed(self.tokens))
+        markdown.inline.setup(self.def_links, footnote_keys)
+
+        out = markdown.renderer.placeholder()
+        while markdown.pop():
+            out += markdown.tok()
+
+        markdown.inline.links = {}
+        markdown.inline.footnotes = {}
+
+        if not markdown.footnotes:
+            return out
+
+        footnotes = sorted(
+            (note for note in markdown.footnotes if footnote_keys.get(note['key'])),
+            key=lambda note: footnote_keys.get(note['key']),
+        )
+        markdown.footnotes = []
+        body = markdown.renderer.placeholder()
+        for note in footnotes:
+            body += markdown.renderer.footnote_item(note['key'], note['text'])
+        return out + markdown.renderer.footnotes(body)
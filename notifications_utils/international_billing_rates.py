@@ -16,13 +16,128 @@ Format of the yaml file looks like:
   - Canada
   - United States
   - Dominican Republic
+
+The rates are read from `international_billing_rates.json`, which is built from the yaml file by
+running `make billing-rates` so that importing this module doesn't need to parse yaml. Nothing is
+read until `load_tables`, one of the rates tables or `lookup` is first used.
 """
 
-import yaml
+import json
 import os
+from collections import namedtuple
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 
-with open('{}/international_billing_rates.yml'.format(dir_path)) as f:
-    INTERNATIONAL_BILLING_RATES = yaml.safe_load(f)
-    COUNTRY_PREFIXES = list(reversed(sorted(INTERNATIONAL_BILLING_RATES.keys(), key=len)))
+YAML_PATH = '{}/international_billing_rates.yml'.format(dir_path)
+JSON_PATH = '{}/international_billing_rates.json'.format(dir_path)
+
+BillingRate = namedtuple('BillingRate', ['prefix', 'billable_units', 'attributes'])
+
+BillingRatesTables = namedtuple('BillingRatesTables', [
+    'INTERNATIONAL_BILLING_RATES',
+    'COUNTRY_PREFIXES',
+    # every prefix with its rate, so that a number is matched by slicing off its first few digits
+    # rather than by walking a list of prefixes
+    'BILLING_RATES_BY_PREFIX',
+    'PREFIX_LENGTHS',
+])
+
+
+@lru_cache(maxsize=None)
+def load_tables():
+    with open(JSON_PATH) as f:
+        rates = json.load(f)
+    return BillingRatesTables(
+        INTERNATIONAL_BILLING_RATES=rates,
+        COUNTRY_PREFIXES=list(reversed(sorted(rates.keys(), key=len))),
+        BILLING_RATES_BY_PREFIX={
+            prefix: BillingRate(prefix, rate['billable_units'], rate['attributes'])
+            for prefix, rate in rates.items()
+        },
+        PREFIX_LENGTHS=sorted({len(prefix) for prefix in rates}),
+    )
+
+
+class _LazyMapping(Mapping):
+    # a read-only view of one of the tables, which isn't loaded until the view is first used
+
+    def __init__(self, name):
+        self._name = name
+
+    def _table(self):
+        return getattr(load_tables(), self._name)
+
+    def __getitem__(self, key):
+        return self._table()[key]
+
+    def __iter__(self):
+        return iter(self._table())
+
+    def __len__(self):
+        return len(self._table())
+
+
+class _LazySequence(Sequence):
+
+    def __init__(self, name):
+        self._name = name
+
+    def _table(self):
+        return getattr(load_tables(), self._name)
+
+    def __getitem__(self, index):
+        return self._table()[index]
+
+    def __len__(self):
+        return len(self._table())
+
+
+# use `load_tables()` for the tables themselves
+INTERNATIONAL_BILLING_RATES = _LazyMapping('INTERNATIONAL_BILLING_RATES')
+COUNTRY_PREFIXES = _LazySequence('COUNTRY_PREFIXES')
+
+
+def build_json(yaml_path=YAML_PATH, json_path=JSON_PATH):
+    """
+    Writes the rates from the yaml file to the json file that they're loaded from
+    """
+    import yaml
+
+    with open(yaml_path) as f:
+        rates = yaml.safe_load(f)
+    with open(json_path, 'w') as f:
+        # one prefix to a line, so that changes to the rates are easy to review
+        f.write('{\n')
+        f.write(',\n'.join(
+            '{}:{}'.format(json.dumps(prefix), json.dumps(rate, separators=(',', ':')))
+            for prefix, rate in rates.items()
+        ))
+        f.write('\n}\n')
+
+
+def lookup(e164_number):
+    """
+    The `BillingRate` for the country calling code of an E.164 number, which isn't validated
+    """
+    # the shortest prefix is the country calling code, so +1 242 numbers are billed at the rate for 1
+    tables = load_tables()
+    digits = e164_number[1:] if e164_number.startswith('+') else e164_number
+    for length in tables.PREFIX_LENGTHS:
+        rate = tables.BILLING_RATES_BY_PREFIX.get(digits[:length])
+        if rate is not None:
+            return rate
+    return None
+
+
+def lookup_many(e164_numbers):
+    rates = {}
+    for number in e164_numbers:
+        if number not in rates:
+            rates[number] = lookup(number)
+    return [rates[number] for number in e164_numbers]
+
+
+if __name__ == '__main__':
+    build_json()
@@ -1,5 +1,7 @@
 import unicodedata
 
+from notifications_utils.translation_table import TranslationTable
+
 
 class SanitiseText:
     ALLOWED_CHARACTERS = set()
@@ -19,7 +21,20 @@ class SanitiseText:
 
     @classmethod
     def encode(cls, content):
-        return ''.join(cls.encode_char(char) for char in content)
+        if cls.ALLOWED_CHARACTERS.issuperset(content):
+            return str(content)
+        return content.translate(cls.get_translation_table())
+
+    @classmethod
+    def get_translation_table(cls):
+        """
+        A table for `str.translate` which maps each character to what `cls.encode_char` returns for it
+        """
+        # looked up in the class's own `__dict__` so that subclasses don't share their parent's table
+        table = cls.__dict__.get('_translation_table')
+        if table is None:
+            table = cls._translation_table = TranslationTable(cls.encode_char)
+        return table
 
     @classmethod
     def get_non_compatible_characters(cls, content):
@@ -99,12 +114,13 @@ class SanitiseSMS(SanitiseText):
     # Welsh characters not already included in GSM
     WELSH_NON_GSM_CHARACTERS = set('ÂâÊêÎîÔôÛûŴŵŶŷ')
 
+    # characters from the GSM extension table, which take two septets each
+    GSM_EXTENSION_CHARACTERS = set('^{}\\[~]|€')
+
     ALLOWED_CHARACTERS = set(
         '@£$¥èéùìòçÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞ\x1bÆæßÉ !"#¤%&\'()*+,-./0123456789:;<=>?' +
-        '¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà' +
-        # character set extension
-        '^{}\\[~]|€'
-    ) | WELSH_NON_GSM_CHARACTERS
+        '¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà'
+    ) | GSM_EXTENSION_CHARACTERS | WELSH_NON_GSM_CHARACTERS
 
 
 class SanitiseASCII(SanitiseText):
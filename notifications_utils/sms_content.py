@@ -0,0 +1,174 @@
+import re
+
+from notifications_utils.columns import Columns
+from notifications_utils.field import Field, Placeholder, str2bool
+from notifications_utils.formatters import (
+    add_prefix,
+    remove_whitespace_before_punctuation,
+    sms_encode,
+    unescaped_formatted_list,
+)
+from notifications_utils.sanitise_text import SanitiseSMS
+
+# the line boundaries that `str.splitlines` (and so `normalise_newlines`) splits on
+line_boundaries = re.compile(r'\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+
+# characters which the SMS formatters might remove or change depending on what's next to them
+context_sensitive_characters = re.compile(r'[\s.,]')
+
+
+class CompiledSMSContent():
+    # measures an SMS template with different values without rendering the whole message. Values
+    # which the formatters could change (see `context_sensitive_characters`) are formatted with the
+    # text either side of them
+
+    def __init__(self, content, prefix=None, encoding='utf-8'):
+        self.encoding = encoding
+
+        static_segments, self.placeholders = [], []
+        start = 0
+        for match in Field.placeholder_pattern.finditer(content):
+            static_segments.append(content[start:match.start()])
+            self.placeholders.append(_Slot(match))
+            start = match.end()
+        static_segments.append(content[start:])
+        static_segments[0] = add_prefix(static_segments[0], prefix)
+
+        self.segments = [sms_encode(segment) for segment in static_segments]
+        self.segment_lengths = [
+            {
+                (first, last): self._formatted_length(segment, first, last)
+                for first in (True, False)
+                for last in (True, False)
+            }
+            for segment in self.segments
+        ]
+        content_without_values = sms_encode(add_prefix(content.strip(), prefix))
+        self.count_without_values = len(content_without_values.encode(encoding))
+        self.unicode_without_values = has_unicode_characters(content_without_values)
+        self.static_count = sum(
+            lengths[index == 0, index == len(self.placeholders)]
+            for index, lengths in enumerate(self.segment_lengths)
+        )
+        self.static_unicode = any(has_unicode_characters(segment) for segment in self.segments)
+
+    def content_count(self, values):
+        if not values:
+            return self.count_without_values
+
+        values = Columns(values)
+        return self._count([
+            self._measure(placeholder.replacement(values)) for placeholder in self.placeholders
+        ])
+
+    def is_message_too_long(self, values, limit):
+        return self.content_count(values) > limit
+
+    def content_counts(self, columns, row_count):
+        # `columns` maps each placeholder to a list with a value for every row. Also returns whether
+        # each row has to be sent as unicode
+        if not columns:
+            return [self.count_without_values] * row_count, [self.unicode_without_values] * row_count
+        if not self.placeholders:
+            return [self.static_count] * row_count, [self.static_unicode] * row_count
+
+        columns = Columns(columns)
+        measurements_by_slot = [
+            self._measure_column(placeholder, columns.get(placeholder.placeholder.name) or [None] * row_count)
+            for placeholder in self.placeholders
+        ]
+
+        counts, unicode, run_lengths = [], [], {}
+        for measurements in zip(*measurements_by_slot):
+            _, lengths, unicode_values = zip(*measurements)
+            if None in lengths:
+                counts.append(self._count(measurements, run_lengths))
+            else:
+                counts.append(self.static_count + sum(lengths))
+            unicode.append(self.static_unicode or any(unicode_values))
+        return counts, unicode
+
+    def _measure_column(self, placeholder, values):
+        measured = {}
+        for value in values:
+            if isinstance(value, list):
+                yield self._measure(placeholder.replacement_for(value))
+                continue
+            if value not in measured:
+                measured[value] = self._measure(placeholder.replacement_for(value))
+            yield measured[value]
+
+    def _measure(self, replacement):
+        # the length is `None` if the value could change the text around it
+        value = sms_encode(replacement)
+        if not value or context_sensitive_characters.search(value):
+            return value, None, has_unicode_characters(value)
+        return value, len(value.encode(self.encoding)), has_unicode_characters(value)
+
+    def _count(self, measurements, run_lengths=None):
+        count = 0
+        run, run_start = [], 0
+
+        for index, (value, length, _) in enumerate(measurements):
+            if length is None:
+                run.append(value)
+                continue
+            count += self._run_length(run, run_start, run_lengths) + length
+            run, run_start = [], index + 1
+
+        return count + self._run_length(run, run_start, run_lengths)
+
+    def _run_length(self, run, run_start, run_lengths):
+        run_end = run_start + len(run)
+        first, last = run_start == 0, run_end == len(self.placeholders)
+        if not run:
+            return self.segment_lengths[run_end][first, last]
+
+        key = (run_start, tuple(run))
+        if run_lengths is not None and key in run_lengths:
+            return run_lengths[key]
+
+        text = ''.join(self.segments[run_start + offset] + value for offset, value in enumerate(run))
+        length = self._formatted_length(text + self.segments[run_end], first, last)
+        if run_lengths is not None:
+            run_lengths[key] = length
+        return length
+
+    def _formatted_length(self, text, first, last):
+        text = line_boundaries.sub('\n', remove_whitespace_before_punctuation(text))
+        if first:
+            text = text.lstrip()
+        if last:
+            text = text.rstrip()
+        return len(text.encode(self.encoding))
+
+
+class _Slot():
+
+    def __init__(self, match):
+        self.placeholder = Placeholder.from_match(match)
+        self.missing = Field(match.group(0), html='passthrough')._raw_formatted
+
+    def replacement(self, values):
+        return self.replacement_for(values.get(self.placeholder.name))
+
+    def replacement_for(self, value):
+        # follows `Field.replace_match` with `html='passthrough'`
+        if self.placeholder.is_conditional() and value is not None:
+            return self.placeholder.conditional_text if str2bool(value) else ''
+
+        if isinstance(value, list):
+            value = list(filter(None, value))
+            if not value:
+                return self.missing
+            return unescaped_formatted_list(value, before_each='', after_each='')
+
+        if value is None:
+            return self.missing
+
+        return str(value)
+
+
+def has_unicode_characters(content):
+    # the same check as `notifications_utils.template.is_unicode`
+    return not SanitiseSMS.WELSH_NON_GSM_CHARACTERS.isdisjoint(content)
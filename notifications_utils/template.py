@@ -1,15 +1,18 @@
 import math
+import re
 import sys
-from os import path
+from collections import namedtuple
+from copy import copy
 from datetime import datetime
 
-from jinja2 import Environment, FileSystemLoader
+from cachetools import LRUCache
 from flask import Markup
 from html import unescape
 
 from notifications_utils import SMS_CHAR_COUNT_LIMIT
 from notifications_utils.columns import Columns
-from notifications_utils.field import Field
+from notifications_utils.caching import InstrumentedCache
+from notifications_utils.field import Field, Placeholder, get_placeholders
 from notifications_utils.formatters import (
     unlink_govuk_escaped,
     nl2br,
@@ -18,6 +21,7 @@ from notifications_utils.formatters import (
     autolink_sms,
     notify_email_markdown,
     notify_email_preheader_markdown,
+    ParsedMarkdown,
     notify_plain_text_email_markdown,
     notify_letter_preview_markdown,
     remove_empty_lines,
@@ -28,6 +32,7 @@ from notifications_utils.formatters import (
     remove_whitespace_before_punctuation,
     make_quotes_smart,
     replace_hyphens_with_en_dashes,
+    replace_hyphens_and_remove_smart_quotes_from_email_addresses,
     replace_hyphens_with_non_breaking_hyphens,
     tweak_dvla_list_markup,
     strip_leading_whitespace,
@@ -39,15 +44,12 @@ from notifications_utils.formatters import (
 )
 from notifications_utils.take import Take
 from notifications_utils.template_change import TemplateChange
+from notifications_utils.template_environments import get_template_env
 from notifications_utils.sanitise_text import SanitiseSMS
+from notifications_utils.sms_content import CompiledSMSContent
 
 
-template_env = Environment(loader=FileSystemLoader(
-    path.join(
-        path.dirname(path.abspath(__file__)),
-        'jinja_templates',
-    )
-))
+template_env = get_template_env()
 
 
 class Template():
@@ -72,20 +74,7 @@ class Template():
         self.template_type = template.get('template_type', None)
         self._template = template
         self.redact_missing_personalisation = redact_missing_personalisation
-        if (jinja_path is not None):
-            self.template_env = Environment(loader=FileSystemLoader(
-                path.join(
-                    path.dirname(jinja_path),
-                    'jinja_templates',
-                )
-            ))
-        else:
-            self.template_env = Environment(loader=FileSystemLoader(
-                path.join(
-                    path.dirname(path.abspath(__file__)),
-                    'jinja_templates',
-                )
-            ))
+        self.template_env = get_template_env(jinja_path)
 
     def __repr__(self):
         return "{}(\"{}\", {})".format(self.__class__.__name__, self.content, self.values)
@@ -119,7 +108,7 @@ class Template():
 
     @property
     def placeholders(self):
-        return Field(self.content).placeholders
+        return get_placeholders(self.content)
 
     @property
     def missing_data(self):
@@ -141,6 +130,9 @@ class Template():
     def is_message_too_long(self):
         return False
 
+    def is_message_too_long_for(self, values):
+        return False
+
 
 class SMSMessageTemplate(Template):
 
@@ -192,12 +184,32 @@ class SMSMessageTemplate(Template):
 
     @property
     def fragment_count(self):
-        content_with_placeholders = str(self)
-        return get_sms_fragment_count(self.content_count, is_unicode(content_with_placeholders))
+        return self.sms_metrics.fragment_count
+
+    @property
+    def sms_metrics(self):
+        # we always want to call SMSMessageTemplate.__str__ regardless of subclass, to avoid any html formatting
+        body = SMSMessageTemplate.__str__(self)
+        return get_sms_metrics(
+            body,
+            character_count=None if self._values else self.content_count,
+            encoding=self.encoding,
+        )
 
     def is_message_too_long(self):
         return self.content_count > SMS_CHAR_COUNT_LIMIT
 
+    def is_message_too_long_for(self, values):
+        return self.compiled_content.is_message_too_long(values, SMS_CHAR_COUNT_LIMIT)
+
+    @property
+    def compiled_content(self):
+        key = (self.content, self.prefix, self.encoding)
+        cached = getattr(self, '_compiled_content', None)
+        if cached is None or cached[0] != key:
+            cached = self._compiled_content = (key, CompiledSMSContent(*key))
+        return cached[1]
+
 
 class SMSPreviewTemplate(SMSMessageTemplate):
 
@@ -286,7 +298,7 @@ class WithSubjectTemplate(Template):
 
     @property
     def placeholders(self):
-        return Field(self._subject).placeholders | Field(self.content).placeholders
+        return get_placeholders(self._subject, self.content)
 
 
 class PlainTextEmailTemplate(WithSubjectTemplate):
@@ -346,8 +358,12 @@ class HTMLEmailTemplate(WithSubjectTemplate):
         logo_with_background_colour=False,
         brand_name=None,
         jinja_path=None,
+        compile_body=False,
+        parse_markdown_once=False,
     ):
         super().__init__(template, values, jinja_path=jinja_path)
+        self.compile_body = compile_body
+        self.parse_markdown_once = parse_markdown_once
         self.fip_banner_english = fip_banner_english
         self.fip_banner_french = fip_banner_french
         self.complete_html = complete_html
@@ -363,7 +379,11 @@ class HTMLEmailTemplate(WithSubjectTemplate):
 
     @property
     def preheader(self):
-        return " ".join(Take(Field(
+        return self._format_preheader(notify_email_preheader_markdown(self._markdown_source))
+
+    @property
+    def _markdown_source(self):
+        return Take(Field(
             self.content,
             self.values,
             html='escape',
@@ -374,19 +394,41 @@ class HTMLEmailTemplate(WithSubjectTemplate):
             strip_unsupported_characters
         ).then(
             add_trailing_newline
-        ).then(
-            notify_email_preheader_markdown
+        )
+
+    def _format_preheader(self, rendered_markdown):
+        return self._shorten_preheader(Take(
+            rendered_markdown
         ).then(
             do_nice_typography
-        ).split())[:self.PREHEADER_LENGTH_IN_CHARACTERS].strip()
+        ))
+
+    def _shorten_preheader(self, preheader):
+        return " ".join(preheader.split())[:self.PREHEADER_LENGTH_IN_CHARACTERS].strip()
+
+    def _body_and_preheader(self):
+        if self.compile_body:
+            compiled = get_compiled_html_email_body(self.content).render_with_preheader(self.values)
+            if compiled:
+                body, preheader = compiled
+                return body, self._shorten_preheader(preheader)
+        if self.compile_body or self.parse_markdown_once:
+            parsed = ParsedMarkdown(self._markdown_source)
+            return (
+                do_nice_typography(parsed.render(notify_email_markdown)),
+                self._format_preheader(parsed.render(notify_email_preheader_markdown)),
+            )
+        return get_html_email_body(self.content, self.values), self.preheader
 
     def __str__(self):
+        return self._render_with_preheader()[0]
+
+    def _render_with_preheader(self):
+        body, preheader = self._body_and_preheader()
 
         return self.jinja_template.render({
-            'body': get_html_email_body(
-                self.content, self.values
-            ),
-            'preheader': self.preheader,
+            'body': body,
+            'preheader': preheader,
             'fip_banner_english': self.fip_banner_english,
             'fip_banner_french': self.fip_banner_french,
             'complete_html': self.complete_html,
@@ -395,7 +437,7 @@ class HTMLEmailTemplate(WithSubjectTemplate):
             'brand_colour': self.brand_colour,
             'logo_with_background_colour': self.logo_with_background_colour,
             'brand_name': self.brand_name,
-        })
+        }), preheader
 
 
 class EmailPreviewTemplate(WithSubjectTemplate):
@@ -510,7 +552,7 @@ class LetterPreviewTemplate(WithSubjectTemplate):
 
     @property
     def placeholders(self):
-        return super().placeholders | Field(self.contact_block).placeholders
+        return get_placeholders(self._subject, self.content, self.contact_block)
 
     @property
     def values_with_default_optional_address_lines(self):
@@ -672,18 +714,48 @@ def get_sms_fragment_count(character_count, is_unicode):
 
 
 def is_unicode(content):
-    return set(content) & set(SanitiseSMS.WELSH_NON_GSM_CHARACTERS)
+    return not SanitiseSMS.WELSH_NON_GSM_CHARACTERS.isdisjoint(content)
 
 
-def get_html_email_body(template_content, template_values, redact_missing_personalisation=False):
+def get_septet_count(content):
+    # characters from the GSM extension table take two septets. Only for text from `SanitiseSMS.encode`
+    return len(content) + sum(content.count(character) for character in SanitiseSMS.GSM_EXTENSION_CHARACTERS)
+
+
+SMSMetrics = namedtuple('SMSMetrics', ['body', 'character_count', 'septet_count', 'is_unicode', 'fragment_count'])
+
+
+def get_sms_metrics(body, character_count=None, encoding='utf-8'):
+    if character_count is None:
+        character_count = len(body.encode(encoding))
+    unicode = is_unicode(body)
+    return SMSMetrics(
+        body=body,
+        character_count=character_count,
+        septet_count=get_septet_count(body),
+        is_unicode=unicode,
+        fragment_count=get_sms_fragment_count(character_count, unicode),
+    )
+
 
-    return Take(Field(
+def get_html_email_body(template_content, template_values, redact_missing_personalisation=False):
+    return render_html_email_body(Field(
         template_content,
         template_values,
         html='escape',
         markdown_lists=True,
         redact_missing_personalisation=redact_missing_personalisation,
-    )).then(
+    ))
+
+
+def get_compiled_html_email_body(template_content):
+    return html_email_body_cache.get_or_set(template_content, CompiledHTMLEmailBody)
+
+
+def render_html_email_body(field):
+    return Take(
+        field
+    ).then(
         unlink_govuk_escaped
     ).then(
         strip_unsupported_characters
@@ -696,7 +768,135 @@ def get_html_email_body(template_content, template_values, redact_missing_person
     )
 
 
+class CompiledHTMLEmailBody():
+    # rendered once with a sentinel for each placeholder, which is swapped for the value if the
+    # value can't change how the text around it is formatted. Otherwise the whole body is rendered
+
+    sentinel = 'zxqplaceholder{}zxq'
+    sentinel_pattern = re.compile(r'zxqplaceholder(\d+)zxq')
+
+    # whitespace, or markdown which is the same on either side of a word
+    safe_before = set(' \t\n*_(')
+    safe_after = set(' \t\n*_),!?;')
+
+    # a value could be the label of a reference link defined elsewhere in the content
+    link_definition = re.compile(r'^ *\[[^\]]+\]:', re.MULTILINE)
+    # the text on a line before a value which starts a list item, inset text or a quote
+    block_marker = re.compile(r'\s*(?:(?:[*+-]|\d+\.|\^|>)\s+)+\Z')
+
+    # words, numbers and amounts like `Jo`, `Jean-Luc`, `£1,000.00` or `10:30`
+    safe_value = re.compile(r'[£$€]?[^\W_]+(?:(?:[ -]|(?<=\d)[.,/:](?=\d))[^\W_]+)*\Z')
+    # the same, but without a currency symbol, because whether `_` or `*` is emphasis depends on
+    # whether the character next to it is part of a word
+    safe_value_next_to_emphasis = re.compile(r'[^\W_]+(?:(?:[ -]|(?<=\d)[.,/:](?=\d))[^\W_]+)*\Z')
+    # the same, but starting and ending with a letter, so it can't start a numbered list
+    safe_value_at_start_of_line = re.compile(
+        r'[^\W\d_](?:[^\W_]*(?:[ -]|(?<=\d)[.,/:](?=\d)))*[^\W\d_]\Z|[^\W\d_]\Z'
+    )
+
+    def __init__(self, content):
+        self.content = content
+        self.placeholders = []
+        body = []
+        segments = Field(content, html='escape', markdown_lists=True).segments
+
+        for index, segment in enumerate(segments):
+            if isinstance(segment, str):
+                body.append(segment)
+                continue
+            body.append(self.sentinel.format(len(self.placeholders)))
+            self.placeholders.append((segment, self._value_pattern(segments, index)))
+
+        self.rendered = str(render_html_email_body(''.join(body)))
+        self.preheader = str(Take(
+            ''.join(body)
+        ).then(
+            unlink_govuk_escaped
+        ).then(
+            strip_unsupported_characters
+        ).then(
+            add_trailing_newline
+        ).then(
+            notify_email_preheader_markdown
+        ).then(
+            do_nice_typography
+        ))
+
+        # markdown expands tabs to the next tab stop, which depends on the length of the values
+        render_every_placeholder_in_full = '\t' in content or self.link_definition.search(content)
+
+        for index, (placeholder, value_pattern) in enumerate(self.placeholders):
+            sentinel = self.sentinel.format(index)
+            if render_every_placeholder_in_full or sentinel in content or sentinel not in self.rendered:
+                self.placeholders[index] = (placeholder, None)
+
+    def _value_pattern(self, segments, index):
+        before = segments[index - 1] if index > 0 else ''
+        after = segments[index + 1] if index + 1 < len(segments) else ''
+        if isinstance(before, Placeholder) or isinstance(after, Placeholder) or segments[index].is_conditional():
+            return None
+        if after[:1] == '.' and after[1:2] in {'', ' ', '\n'}:
+            after = after[1:]
+        if before[-1:] not in self.safe_before | {''} or after[:1] not in self.safe_after | {''}:
+            return None
+        # a link's URL would carry on into the value, up to its first space
+        word_before = before.split()[-1] if before.strip() and not before[-1].isspace() else ''
+        if '://' in word_before or word_before.endswith(']('):
+            return None
+        if before.rstrip(' \t')[-1:] in {'', '\n'} or self.block_marker.match(before.rsplit('\n', 1)[-1]):
+            return self.safe_value_at_start_of_line
+        if before[-1:] in {'*', '_'} or after[:1] in {'*', '_'}:
+            return self.safe_value_next_to_emphasis
+        return self.safe_value
+
+    def render(self, values):
+        replacements = self._replacements(values)
+        if replacements is None:
+            return get_html_email_body(self.content, values)
+        return self._substitute(self.rendered, replacements)
+
+    def render_with_preheader(self, values):
+        # the preheader isn't collapsed or shortened, or `None` if the values can't be swapped in
+        replacements = self._replacements(values)
+        if replacements is None:
+            return None
+        return self._substitute(self.rendered, replacements), self._substitute(self.preheader, replacements)
+
+    def _replacements(self, values):
+        field_values = Columns(values) if values else {}
+        replacements = []
+        for placeholder, value_pattern in self.placeholders:
+            value = field_values.get(placeholder.name)
+            if value_pattern is None or value is None or isinstance(value, list):
+                return None
+            value = str(value)
+            if not value_pattern.match(value):
+                return None
+            replacements.append(value)
+        return replacements
+
+    def _substitute(self, rendered, replacements):
+        return self.sentinel_pattern.sub(lambda match: replacements[int(match.group(1))], rendered)
+
+
+html_email_body_cache = InstrumentedCache('html-email-body', maxsize=256)
+
+
 def do_nice_typography(value):
+    # spaces before punctuation change how smartypants curls quotes, so they have to go first
+    return Take(
+        value
+    ).then(
+        remove_whitespace_before_punctuation
+    ).then(
+        make_quotes_smart
+    ).then(
+        replace_hyphens_and_remove_smart_quotes_from_email_addresses
+    )
+
+
+def do_nice_typography_reference(value):
+    # the same as `do_nice_typography`, one formatter at a time
     return Take(
         value
     ).then(
@@ -708,3 +908,53 @@ def do_nice_typography(value):
     ).then(
         replace_hyphens_with_en_dashes
     )
+
+
+RenderedMessage = namedtuple('RenderedMessage', ['body', 'subject', 'preheader'])
+
+
+def render_many(template, values_iterable, kind=None, cache_size=128, **kwargs):
+    # yields a `RenderedMessage` for each dict of values, rendering each distinct set of values once
+    kind = kind or template.get('template_type')
+    if kind not in render_many.template_classes:
+        raise TypeError("Can't render {} templates".format(kind))
+    if kind == 'email':
+        kwargs.setdefault('compile_body', True)
+    prototype = render_many.template_classes[kind](template, **kwargs)
+
+    placeholders = tuple(prototype.placeholders)
+    rendered = LRUCache(cache_size)
+
+    for values in values_iterable:
+        key = _personalisation_key(placeholders, values)
+        if key not in rendered:
+            rendered[key] = _render_message(prototype, values)
+        yield rendered[key]
+
+
+render_many.template_classes = {
+    'sms': SMSMessageTemplate,
+    'email': HTMLEmailTemplate,
+    'plain_text_email': PlainTextEmailTemplate,
+}
+
+
+def _personalisation_key(placeholders, values):
+    values = Columns(values or {})
+    return tuple(
+        tuple(value) if isinstance(value, list) else value
+        for value in (values.get(placeholder) for placeholder in placeholders)
+    )
+
+
+def _render_message(prototype, values):
+    template = copy(prototype)
+    template.values = values
+    if isinstance(template, HTMLEmailTemplate):
+        body, preheader = template._render_with_preheader()
+        return RenderedMessage(body=body, subject=template.subject, preheader=preheader)
+    return RenderedMessage(
+        body=str(template),
+        subject=getattr(template, 'subject', None),
+        preheader=getattr(template, 'preheader', None),
+    )
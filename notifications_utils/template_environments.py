@@ -0,0 +1,67 @@
+from os import path
+from threading import Lock
+
+from jinja2 import BytecodeCache, Environment, FileSystemBytecodeCache, FileSystemLoader
+
+
+class InMemoryBytecodeCache(BytecodeCache):
+
+    def __init__(self):
+        self._bytecode = {}
+
+    def load_bytecode(self, bucket):
+        bytecode = self._bytecode.get(bucket.key)
+        if bytecode is not None:
+            bucket.bytecode_from_string(bytecode)
+
+    def dump_bytecode(self, bucket):
+        self._bytecode[bucket.key] = bucket.bytecode_to_string()
+
+    def clear(self):
+        self._bytecode.clear()
+
+
+class TemplateEnvironments():
+    # one environment for each directory of templates. They don't check whether template files have
+    # changed, so rendering a template which has been loaded doesn't touch the disk
+
+    def __init__(self):
+        self._lock = Lock()
+        self.configure()
+
+    def configure(self, bytecode_directory=None):
+        with self._lock:
+            self._environments = {}
+            self.bytecode_cache = (
+                FileSystemBytecodeCache(bytecode_directory) if bytecode_directory else InMemoryBytecodeCache()
+            )
+
+    def get(self, directory):
+        directory = path.abspath(directory)
+        environment = self._environments.get(directory)
+        if environment is None:
+            with self._lock:
+                environment = self._environments.get(directory)
+                if environment is None:
+                    environment = self._environments[directory] = Environment(
+                        loader=FileSystemLoader(directory),
+                        bytecode_cache=self.bytecode_cache,
+                        auto_reload=False,
+                    )
+        return environment
+
+    def precompile(self, directory):
+        environment = self.get(directory)
+        for name in environment.list_templates(extensions=['jinja2']):
+            environment.get_template(name)
+        return environment
+
+
+template_environments = TemplateEnvironments()
+
+
+def get_template_env(jinja_path=None):
+    return template_environments.get(path.join(
+        path.dirname(jinja_path if jinja_path is not None else path.abspath(__file__)),
+        'jinja_templates',
+    ))
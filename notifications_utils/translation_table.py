@@ -0,0 +1,10 @@
+class TranslationTable(dict):
+    # works out each replacement the first time `str.translate` looks it up
+
+    def __init__(self, encode_char):
+        super().__init__()
+        self.encode_char = encode_char
+
+    def __missing__(self, codepoint):
+        replacement = self[codepoint] = self.encode_char(chr(codepoint))
+        return replacement
@@ -5,7 +5,8 @@ from notifications_utils.template import (
     Template,
     SMSMessageTemplate,
     SMSPreviewTemplate,
-    WithSubjectTemplate
+    WithSubjectTemplate,
+    get_sms_metrics,
 )
 
 
@@ -186,6 +187,50 @@ def test_sms_fragment_count_unicode_encoding(char_count, expected_sms_fragment_c
         assert template.fragment_count == expected_sms_fragment_count
 
 
+@pytest.mark.parametrize('template_cls', [SMSMessageTemplate, SMSPreviewTemplate])
+@pytest.mark.parametrize('content, values', [
+    ('The quick brown fox jumped over the lazy dog', {}),
+    ('Hello ((name)) , your code is ((code))', {}),
+    ('Hello ((name)) , your code is ((code))', {'name': 'Jo', 'code': '{1234}'}),
+    ('Hello ((name))', {'name': 'Ŵêlsh ' * 20}),
+    ('€ ' * 100, {}),
+    ('深 ' * 50, {'unused': 'value'}),
+])
+def test_sms_metrics_match_rendering_and_counting_separately(template_cls, content, values):
+    template = template_cls({'content': content}, values, prefix='Service name')
+
+    metrics = template.sms_metrics
+
+    assert metrics.body == SMSMessageTemplate.__str__(template)
+    assert metrics.character_count == template.content_count
+    assert metrics.fragment_count == template.fragment_count
+    assert metrics.is_unicode == any(character in 'ÂâÊêÎîÔôÛûŴŵŶŷ' for character in metrics.body)
+
+
+@pytest.mark.parametrize('body, septet_count, is_unicode', [
+    ('', 0, False),
+    ('Hello', 5, False),
+    ('Costs €5 [or more]', 21, False),
+    ('^{}\\[~]|€', 18, False),
+    ('Ŵêlsh', 5, True),
+])
+def test_get_sms_metrics(body, septet_count, is_unicode):
+    metrics = get_sms_metrics(body)
+
+    assert metrics.body == body
+    assert metrics.character_count == len(body.encode('utf-8'))
+    assert metrics.septet_count == septet_count
+    assert metrics.is_unicode is is_unicode
+
+
+def test_sms_metrics_render_the_message_once(mocker):
+    template = SMSMessageTemplate({'content': 'Hello ((name))'}, {'name': 'Jo'})
+    render = mocker.spy(SMSMessageTemplate, '__str__')
+
+    assert template.sms_metrics.fragment_count == 1
+    assert render.call_count == 1
+
+
 def test_random_variable_retrieve():
     template = Template({'content': 'content', 'template_type': 'sms', 'created_by': "now"})
     assert template.get_raw('created_by') == "now"
@@ -0,0 +1,72 @@
+import time
+from unittest.mock import Mock, call
+
+from notifications_utils.caching import InstrumentedCache
+
+
+def test_get_or_set_counts_hits_and_misses():
+    get_value = Mock(side_effect=str.upper)
+    cache = InstrumentedCache('test-cache', maxsize=10)
+
+    assert cache.get_or_set('foo', get_value) == 'FOO'
+    assert cache.get_or_set('foo', get_value) == 'FOO'
+    assert cache.get_or_set('bar', get_value) == 'BAR'
+
+    assert get_value.call_args_list == [call('foo'), call('bar')]
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.hit_rate == 1 / 3
+    assert len(cache) == 2
+
+
+def test_hit_rate_is_zero_before_any_lookups():
+    assert InstrumentedCache('test-cache', maxsize=10).hit_rate == 0
+
+
+def test_evicts_least_recently_used_entry():
+    cache = InstrumentedCache('test-cache', maxsize=2)
+
+    cache.get_or_set('a', str.upper)
+    cache.get_or_set('b', str.upper)
+    cache.get_or_set('a', str.upper)
+    cache.get_or_set('c', str.upper)
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+
+
+def test_entries_expire_after_ttl():
+    cache = InstrumentedCache('test-cache', maxsize=10, ttl=0.01)
+    cache.get_or_set('a', str.upper)
+    assert 'a' in cache
+    time.sleep(0.02)
+    assert 'a' not in cache
+
+
+def test_configure_empties_cache_and_changes_size():
+    cache = InstrumentedCache('test-cache', maxsize=10)
+    cache.get_or_set('a', str.upper)
+
+    cache.configure(maxsize=1)
+    assert len(cache) == 0
+
+    cache.get_or_set('a', str.upper)
+    cache.get_or_set('b', str.upper)
+    assert len(cache) == 1
+
+
+def test_report_stats_sends_counts_since_last_report():
+    statsd_client = Mock()
+    cache = InstrumentedCache('test-cache', maxsize=10)
+    cache.get_or_set('a', str.upper)
+    cache.get_or_set('a', str.upper)
+    cache.get_or_set('a', str.upper)
+
+    cache.report_stats(statsd_client)
+
+    assert statsd_client.incr.call_args_list == [
+        call('test-cache.hit', 2),
+        call('test-cache.miss', 1),
+    ]
+    statsd_client.gauge.assert_called_once_with('test-cache.size', 1)
+    assert (cache.hits, cache.misses) == (0, 0)
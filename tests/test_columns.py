@@ -1,7 +1,7 @@
 import pytest
 
 from functools import partial
-from notifications_utils.columns import Columns, Row, Cell
+from notifications_utils.columns import Columns, Row, RowSchema, Cell
 
 
 def test_columns_as_dict_with_keys():
@@ -54,3 +54,95 @@ def test_missing_data():
 ])
 def test_lookup(key, should_be_present, in_dictionary):
     assert (key in Columns(in_dictionary)) == should_be_present
+
+
+@pytest.mark.parametrize('key, expected', [
+    ('Phone number', 'phonenumber'),
+    ('phone_number', 'phonenumber'),
+    ('PHONE-NUMBER', 'phonenumber'),
+    (' Date of  birth ', 'dateofbirth'),
+    ('ÉCOLE', 'école'),
+    ('ΟΔΟΣ', 'οδοσ'),
+    ('\tname', '\tname'),
+    ('', ''),
+    (None, None),
+])
+def test_make_key(key, expected):
+    assert Columns.make_key(key) == expected
+
+
+def test_make_key_matches_lowercasing_each_character():
+    keys = ['{} column_{}-İΣ'.format(chr(codepoint), codepoint) for codepoint in range(0x20, 0x3000)]
+    assert [Columns.make_key(key) for key in keys] == [
+        ''.join(character.lower() for character in key if character not in ' _-') for key in keys
+    ]
+
+
+def test_columns_get():
+    columns = Columns({'Name': 'Jo', 'Town': None})
+    assert columns.get('NAME') == 'Jo'
+    assert columns.get('town') is None
+    assert columns.get('town', 'Toronto') == 'Toronto'
+    assert columns.get('postcode', 'K1A 0B1') == 'K1A 0B1'
+
+
+def test_row_schema_only_normalises_each_way_of_writing_a_key_once(mocker):
+    schema = RowSchema(('Phone number', 'Name'))
+    make_key = mocker.patch.object(Columns, 'make_key', side_effect=Columns.make_key)
+
+    assert [schema.position(key) for key in ('name', 'NAME', 'name', 'phone_number', 'town', 'town')] == [
+        1, 1, 1, 0, None, None,
+    ]
+    assert make_key.call_args_list == [
+        mocker.call('name'), mocker.call('NAME'), mocker.call('phone_number'), mocker.call('town'),
+    ]
+
+
+def test_row_stores_values_against_a_shared_schema():
+    def error_fn(key, value):
+        return Cell.missing_field_error if value is None else None
+
+    rows = [
+        Row(
+            {'Phone number': '6502532222', 'Name': name, 'Town': None},
+            index=index,
+            error_fn=error_fn,
+            recipient_column_headers=['phone number'],
+            placeholders={'name'},
+            template=None,
+        )
+        for index, name in enumerate(('Jo', None))
+    ]
+
+    assert rows[0]._schema is rows[1]._schema
+    assert rows[0]._errors == {2: Cell.missing_field_error}
+    assert rows[1]._errors == {1: Cell.missing_field_error, 2: Cell.missing_field_error}
+    assert not hasattr(rows[0], '__dict__')
+    assert not hasattr(Cell(), '__dict__')
+
+    assert list(rows[0]) == ['phonenumber', 'name', 'town']
+    assert 'phone_number' in rows[0]
+    assert 'foo' not in rows[0]
+    assert rows[0]['NAME'] == Cell('name', 'Jo', placeholders={'name'})
+    assert rows[0]['town'].error == Cell.missing_field_error
+    assert rows[0]['town'].ignore is True
+    assert rows[0].recipient == '6502532222'
+    assert rows[0].personalisation == {'name': 'Jo'}
+    assert rows[0].recipient_and_personalisation == {'phonenumber': '6502532222', 'name': 'Jo', 'town': None}
+    assert rows[0].has_error
+    assert rows[0].has_missing_data
+    assert not rows[0].has_bad_recipient
+
+
+def test_row_uses_the_last_of_columns_with_the_same_key():
+    row = Row(
+        {'name': 'Jo', 'NAME': None},
+        index=0,
+        error_fn=lambda key, value: 'Missing' if value is None else 'Ignored',
+        recipient_column_headers=[],
+        placeholders=['name'],
+        template=None,
+    )
+    assert len(row) == 1
+    assert row['name'] == Cell('name', None, lambda key, value: 'Missing', ['name'])
+    assert row.has_missing_data
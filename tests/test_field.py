@@ -1,5 +1,16 @@
+import re
+
 import pytest
-from notifications_utils.field import Field, str2bool
+from orderedset import OrderedSet
+
+from notifications_utils.field import (
+    Field,
+    get_placeholders,
+    placeholders_cache,
+    segments_cache,
+    str2bool,
+    tokenise,
+)
 
 
 @pytest.mark.parametrize("content", [
@@ -327,3 +338,60 @@ def test_what_will_trigger_conditional_placeholder(value):
 def test_field_renders_lists_as_strings(values, expected, expected_as_markdown):
     assert str(Field("list: ((placeholder))", values, markdown_lists=True)) == expected_as_markdown
     assert str(Field("list: ((placeholder))", values)) == expected
+
+
+def test_tokenise_splits_content_into_literals_and_placeholders():
+    segments = tokenise('Hello ((name)), ((show??you’re in)) ((a))((b))')
+    assert [
+        segment if isinstance(segment, str) else segment.body for segment in segments
+    ] == [
+        'Hello ', 'name', ', ', 'show??you’re in', ' ', 'a', 'b'
+    ]
+    assert tokenise('') == ()
+
+
+def test_field_only_tokenises_content_once(mocker):
+    segments_cache.clear()
+    tokenise_mock = mocker.patch('notifications_utils.field.tokenise', side_effect=tokenise)
+
+    for name in ('Jo', 'Chris', None):
+        Field('Hello ((name))', {'name': name}, html='escape').replaced
+
+    Field('Hello ((name))', {'name': 'Jo'}, html='strip').replaced
+
+    assert tokenise_mock.call_args_list == [
+        mocker.call('Hello ((name))'),
+        mocker.call('Hello ((name))'),
+    ]
+
+
+@pytest.mark.parametrize('content', [
+    'Hello ((name))',
+    '((name??Hi ))((name)), ((missing))',
+    '<em>((name))</em> & ((other thing))',
+    '(((name)))',
+    'no placeholders',
+])
+@pytest.mark.parametrize('html', ['strip', 'escape', 'passthrough'])
+def test_segments_render_the_same_as_substituting_matches(content, html):
+    field = Field(content, {'name': 'Jo <b>'}, html=html)
+    assert field.replaced == re.sub(field.placeholder_pattern, field.replace_match, field.sanitizer(content))
+    assert field.formatted == re.sub(field.placeholder_pattern, field.format_match, field.sanitizer(content))
+
+
+def test_get_placeholders_only_finds_placeholders_once():
+    placeholders_cache.clear()
+    placeholders_cache.hits = placeholders_cache.misses = 0
+
+    assert get_placeholders('((b)) ((a))', '((a)) ((c??d))') == OrderedSet(['b', 'a', 'c'])
+    assert Field('((b)) ((a))').placeholders == OrderedSet(['b', 'a'])
+    assert Field('((b)) ((a))').placeholders == OrderedSet(['b', 'a'])
+
+    assert (placeholders_cache.hits, placeholders_cache.misses) == (1, 2)
+    assert placeholders_cache.hit_rate == 1 / 3
+
+
+def test_get_placeholders_returns_a_new_set_each_time():
+    placeholders = get_placeholders('((a))')
+    placeholders.add('b')
+    assert get_placeholders('((a))') == OrderedSet(['a'])
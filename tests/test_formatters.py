@@ -6,6 +6,8 @@ from notifications_utils.formatters import (
     notify_email_markdown,
     notify_letter_preview_markdown,
     notify_plain_text_email_markdown,
+    notify_email_preheader_markdown,
+    ParsedMarkdown,
     sms_encode,
     formatted_list,
     strip_dvla_markup,
@@ -14,6 +16,7 @@ from notifications_utils.formatters import (
     remove_whitespace_before_punctuation,
     make_quotes_smart,
     replace_hyphens_with_en_dashes,
+    replace_hyphens_and_remove_smart_quotes_from_email_addresses,
     tweak_dvla_list_markup,
     nl2li,
     strip_whitespace,
@@ -1065,9 +1068,46 @@ def test_remove_smart_quotes_from_email_addresses():
     """)
 
 
+@pytest.mark.parametrize('value', [
+    'first.o’last@example.com - someone’s email address',
+    'a.o’b@example.com c.o’d@example.com\ne.o’f@example.com  g.o’h@example.com',
+    'one - two -- three --- four ---- five',
+    '@ a@ @b ’@’',
+    'dash -\n- dash',
+])
+def test_replace_hyphens_and_remove_smart_quotes_from_email_addresses(value):
+    assert replace_hyphens_and_remove_smart_quotes_from_email_addresses(value) == replace_hyphens_with_en_dashes(
+        remove_smart_quotes_from_email_addresses(value)
+    )
+
+
 def test_strip_unsupported_characters():
     assert strip_unsupported_characters("line one\u2028line two") == ("line oneline two")
 
 
 def test_normalise_whitespace():
     assert normalise_whitespace('\u200C Your tax   is\ndue\n\n') == 'Your tax is due'
+
+
+@pytest.mark.parametrize('markdown', [
+    '',
+    'Hello world\n',
+    '# Heading\n\nSome **bold** text with a [link](https://example.com) and https://www.gov.uk\n',
+    '* one\n* two\n\n1. first\n2. second\n',
+    '^ inset text\n\n---\n\nafter a rule\n',
+    'A [reference link][ref]\n\n[ref]: https://example.com "Title"\n',
+    'A footnote[^note] and another[^other]\n\n[^note]: The note\n[^other]: The other note\n',
+    '<p>html</p>\n\n    indented code\n',
+])
+@pytest.mark.parametrize('markdown_renderer', [
+    notify_email_markdown,
+    notify_email_preheader_markdown,
+    notify_plain_text_email_markdown,
+    notify_letter_preview_markdown,
+])
+def test_parsed_markdown_renders_the_same_as_parsing_again(markdown, markdown_renderer):
+    parsed = ParsedMarkdown(markdown)
+    expected = markdown_renderer(markdown)
+
+    assert parsed.render(markdown_renderer) == expected
+    assert parsed.render(markdown_renderer) == expected
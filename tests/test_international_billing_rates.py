@@ -1,8 +1,20 @@
+import subprocess
+import sys
+
 import pytest
+import yaml
 
+from notifications_utils import international_billing_rates
 from notifications_utils.international_billing_rates import (
+    YAML_PATH,
+    JSON_PATH,
+    build_json,
     INTERNATIONAL_BILLING_RATES,
     COUNTRY_PREFIXES,
+    BillingRate,
+    load_tables,
+    lookup,
+    lookup_many,
 )
 
 
@@ -30,3 +42,65 @@ def test_international_billing_rates_are_in_correct_format(country_prefix, value
 
 def test_country_codes():
     assert len(COUNTRY_PREFIXES) == 214
+
+
+@pytest.mark.parametrize('number, expected_prefix', [
+    ('+16502532222', '1'),
+    ('16502532222', '1'),
+    ('+12423570000', '1'),
+    ('+18765550123', '1'),
+    ('+447900900123', '44'),
+    ('+201212341234', '20'),
+    ('+2302086859', '230'),
+    ('+79587714230', '7'),
+])
+def test_lookup(number, expected_prefix):
+    rate = INTERNATIONAL_BILLING_RATES[expected_prefix]
+    assert lookup(number) == BillingRate(expected_prefix, rate['billable_units'], rate['attributes'])
+
+
+@pytest.mark.parametrize('number', ['', '+', '+0123456789', '+999123456'])
+def test_lookup_returns_none_for_unknown_prefixes(number):
+    assert lookup(number) is None
+
+
+def test_lookup_matches_shortest_prefix_in_billing_rates():
+    for prefix in COUNTRY_PREFIXES:
+        number = '+' + prefix + '0123456789'
+        shortest_prefix = next(prefix for prefix in reversed(COUNTRY_PREFIXES) if number[1:].startswith(prefix))
+        assert lookup(number).prefix == shortest_prefix
+
+
+def test_lookup_many():
+    numbers = ['+16502532222', '+447900900123', '+999123456', '+16502532222']
+    assert lookup_many(numbers) == [lookup(number) for number in numbers]
+
+
+def test_prebuilt_rates_match_yaml():
+    with open(YAML_PATH) as f:
+        assert INTERNATIONAL_BILLING_RATES == yaml.safe_load(f)
+
+
+def test_build_json_writes_prebuilt_rates(tmpdir):
+    json_path = str(tmpdir.join('international_billing_rates.json'))
+
+    build_json(json_path=json_path)
+
+    with open(json_path) as built, open(JSON_PATH) as prebuilt:
+        assert built.read() == prebuilt.read(), 'run `make billing-rates` to rebuild the json file'
+
+
+def test_rates_arent_loaded_on_import():
+    assert subprocess.check_output([sys.executable, '-c', (
+        'import sys\n'
+        'from notifications_utils import recipients, international_billing_rates\n'
+        'from notifications_utils.international_billing_rates import INTERNATIONAL_BILLING_RATES, COUNTRY_PREFIXES\n'
+        'print(\'yaml\' in sys.modules, international_billing_rates.load_tables.cache_info().currsize)\n'
+    )]).decode().split() == ['False', '0']
+
+
+def test_rates_tables_are_module_attributes():
+    # rather than coming from a module __getattr__, which needs Python 3.7
+    assert not hasattr(international_billing_rates, '__getattr__')
+    assert dict(INTERNATIONAL_BILLING_RATES) == load_tables().INTERNATIONAL_BILLING_RATES
+    assert list(COUNTRY_PREFIXES) == load_tables().COUNTRY_PREFIXES
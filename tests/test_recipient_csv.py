@@ -1,11 +1,22 @@
 import pytest
 import itertools
 import unicodedata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from functools import partial
+from io import BytesIO, StringIO
+from unittest.mock import Mock
 from orderedset import OrderedSet
 
 from notifications_utils import SMS_CHAR_COUNT_LIMIT
-from notifications_utils.recipients import Cell, RecipientCSV, Row
+from notifications_utils.recipients import (
+    Cell,
+    ParallelRecipientCSV,
+    RecipientCSV,
+    Row,
+    RowValidationResults,
+    StreamingRecipientCSV,
+    iter_stripped_lines,
+)
 from notifications_utils.template import SMSMessageTemplate
 
 
@@ -276,6 +287,64 @@ def test_get_annotated_rows(file_contents, template_type, expected):
     assert not recipients.has_errors
 
 
+def test_summary_checks_each_row_once(mocker):
+    has_error_mock = mocker.patch.object(Row, 'has_error', new_callable=mocker.PropertyMock, return_value=True)
+    recipients = RecipientCSV(
+        """
+            email address, name
+            a@b.com,
+            a@b.com, My Name
+            a@b.com,
+        """,
+        template_type='email',
+        placeholders=['name'],
+        max_errors_shown=2,
+    )
+
+    assert recipients.has_errors
+    assert len(list(recipients.rows_with_errors)) == 3
+    assert len(list(recipients.displayed_rows)) == 2
+    assert recipients.allowed_to_send_to
+    assert has_error_mock.call_count == 3
+
+    assert recipients.summary.row_count == 3
+    assert recipients.summary.counts == {
+        'has_error': 3,
+        'has_bad_recipient': 0,
+        'has_missing_data': 2,
+        'message_too_long': 0,
+    }
+    assert recipients.summary.indexes['has_missing_data'] == [0, 2]
+
+
+def test_column_plan():
+    recipients = RecipientCSV(
+        """
+            address_line_1, Address Line 3, postcode, Name, colour
+        """,
+        template_type='letter',
+        placeholders=['name'],
+    )
+    assert {
+        column_name: (column.key, column.role)
+        for column_name, column in recipients.column_plan.items()
+    } == {
+        'address_line_1': ('addressline1', 'recipient'),
+        'Address Line 3': ('addressline3', 'optional_address'),
+        'postcode': ('postcode', 'recipient'),
+        'Name': ('name', 'placeholder'),
+        'colour': ('colour', 'ignored'),
+    }
+    assert recipients.column_plan['address_line_1'].validator(None) == 'Missing'
+    assert recipients.column_plan['Address Line 3'].validator(None) is None
+    assert recipients.column_plan['Name'].validator('') == 'Missing'
+    assert recipients.column_plan['colour'].validator(None) is None
+
+    recipients.placeholders = ['colour']
+    assert recipients.column_plan['Name'].role == 'ignored'
+    assert recipients.column_plan['colour'].role == 'placeholder'
+
+
 def test_get_rows_with_errors():
     recipients = RecipientCSV(
         """
@@ -1052,3 +1121,266 @@ def test_multi_line_placeholders_work():
     )
 
     assert recipients.rows[0].personalisation['data'] == 'a\nb\n\nc'
+
+
+@pytest.mark.parametrize('file_contents', [
+    '',
+    'email address',
+    '\n\n  email address, name  \ntest@example.com, Jo\n\n',
+    '\u200B,,emailaddress\r\ntest@example.com,\r\n,\n \n',
+    'email address, data\na@b.com, "a\nb\n\nc"\nc@d.com,e,',
+    ',\n , \n',
+])
+@pytest.mark.parametrize('chunk_size', [1, 3, 1024])
+def test_iter_stripped_lines_matches_stripping_the_whole_file(file_contents, chunk_size):
+    assert ''.join(
+        iter_stripped_lines(BytesIO(file_contents.encode('utf-8')), chunk_size=chunk_size)
+    ) == RecipientCSV(file_contents, template_type='email').file_data.strip()
+
+
+@pytest.mark.parametrize('to_stream', [
+    lambda data: StringIO(data),
+    lambda data: BytesIO(data.encode('utf-8')),
+])
+def test_streaming_recipient_csv_matches_recipient_csv(to_stream):
+    file_contents = """
+        phone number, name
+        6502532222, Jo
+        12345, Jo
+        6502532222,
+        +1 650 253 2222, Jo
+        ,
+        6502532223, Jo
+    """
+    kwargs = dict(
+        template_type='sms',
+        placeholders=['name'],
+        max_errors_shown=2,
+        max_initial_rows_shown=3,
+        safelist=['6502532222'],
+    )
+    recipients = RecipientCSV(file_contents, **kwargs)
+    streamed_recipients = StreamingRecipientCSV(to_stream(file_contents), **kwargs)
+
+    assert len(streamed_recipients) == len(recipients) == 6
+    assert streamed_recipients.column_headers == recipients.column_headers
+    assert streamed_recipients.has_errors is recipients.has_errors is True
+    assert streamed_recipients.allowed_to_send_to is recipients.allowed_to_send_to is False
+    assert _index_rows(streamed_recipients.initial_rows) == _index_rows(recipients.initial_rows) == {0, 1, 2}
+    assert _index_rows(streamed_recipients.displayed_rows) == _index_rows(recipients.displayed_rows) == {1, 2}
+    assert _index_rows(recipients.rows_with_bad_recipients) == {1}
+    assert _index_rows(streamed_recipients.rows_with_bad_recipients) == {1}
+    assert _index_rows(recipients.rows_with_missing_data) == {2, 4}
+    assert _index_rows(streamed_recipients.rows_with_missing_data) == {2, 4}
+    assert streamed_recipients.summary.counts == recipients.summary.counts == {
+        'has_error': 3,
+        'has_bad_recipient': 1,
+        'has_missing_data': 2,
+        'message_too_long': 0,
+    }
+
+
+def test_streaming_recipient_csv_only_keeps_rows_it_will_show():
+    recipients = StreamingRecipientCSV(
+        BytesIO(("email address,name\n" + ("a@b.com,\n" * 1000) + "a@b.com,Jo").encode('utf-8')),
+        template_type='email',
+        placeholders=['name'],
+        max_initial_rows_shown=3,
+        max_errors_shown=5,
+    )
+    assert len(recipients) == 1001
+    assert recipients.summary.counts['has_missing_data'] == 1000
+    assert recipients.summary.indexes['has_missing_data'] == [0, 1, 2, 3, 4]
+    assert sorted(recipients._kept_rows) == [0, 1, 2, 3, 4]
+    assert len(list(recipients.initial_rows)) == 3
+    assert len(list(recipients.displayed_rows)) == 5
+    with pytest.raises(TypeError):
+        recipients[0]
+    with pytest.raises(TypeError):
+        recipients.rows
+
+
+def test_streaming_recipient_csv_counts_rows_over_the_limit():
+    recipients = StreamingRecipientCSV(
+        StringIO("email address\n" + ("a@b.com\n" * 11)),
+        template_type='email',
+        max_rows=10,
+    )
+    assert len(recipients) == 11
+    assert recipients.too_many_rows is True
+    assert recipients.has_errors is True
+
+
+@pytest.mark.parametrize('executor', [
+    partial(ThreadPoolExecutor, max_workers=2),
+    partial(ProcessPoolExecutor, max_workers=2),
+])
+@pytest.mark.parametrize('chunk_size', [1, 2, 100])
+def test_parallel_recipient_csv_matches_recipient_csv(executor, chunk_size):
+    file_contents = """
+        phone number, name
+        6502532222, Jo
+        12345, Jo
+        6502532222,
+        +1 650 253 2222, Jo
+
+        6502532223, Jo
+        +44 7900 900 123, Jo
+    """
+    kwargs = dict(
+        template_type='sms',
+        placeholders=['name'],
+        safelist=['6502532222'],
+        max_rows=6,
+    )
+    recipients = RecipientCSV(file_contents, **kwargs)
+    with executor() as pool:
+        parallel_recipients = ParallelRecipientCSV(file_contents, executor=pool, chunk_size=chunk_size, **kwargs)
+        assert parallel_recipients.summary.__dict__ == recipients.summary.__dict__
+
+    assert len(parallel_recipients) == len(recipients) == 7
+    assert parallel_recipients.too_many_rows is True
+    assert parallel_recipients.allowed_to_send_to is False
+    assert _index_rows(parallel_recipients.rows_with_bad_recipients) == {1}
+    assert _index_rows(parallel_recipients.rows_with_missing_data) == {2, 4}
+    assert [
+        (row.recipient, row.get('phone number').error) for row in parallel_recipients.rows if row
+    ] == [
+        (row.recipient, row.get('phone number').error) for row in recipients.rows if row
+    ]
+
+
+@pytest.mark.parametrize('executor', [
+    None,
+    partial(ProcessPoolExecutor, max_workers=2),
+])
+def test_parallel_recipient_csv_finds_messages_too_long_in_other_processes(executor):
+    template = SMSMessageTemplate(
+        {'content': 'Hello ((name))', 'template_type': 'sms'},
+        prefix='Service name',
+        show_prefix=True,
+    )
+    long_name = 'Jo' * (SMS_CHAR_COUNT_LIMIT // 2)
+    file_contents = "phone number,name\n6502532222,Jo\n6502532222,{}\n6502532223,Al\n".format(long_name)
+    kwargs = dict(template_type='sms', placeholders=['name'], template=template)
+
+    if executor:
+        with executor() as pool:
+            recipients = ParallelRecipientCSV(file_contents, executor=pool, chunk_size=1, **kwargs)
+            recipients.summary
+    else:
+        recipients = ParallelRecipientCSV(file_contents, max_workers=2, chunk_size=2, **kwargs)
+
+    assert _index_rows(recipients.rows_with_message_too_long) == {1}
+    assert _index_rows(recipients.rows_with_errors) == {1}
+    assert recipients.summary.__dict__ == RecipientCSV(file_contents, **kwargs).summary.__dict__
+
+
+def test_parallel_recipient_csv_doesnt_validate_recipients_again(mocker):
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        recipients = ParallelRecipientCSV(
+            "email address\na@b.com\nnot an email\n",
+            template_type='email',
+            executor=pool,
+        )
+        assert recipients.has_errors
+
+    validate_mock = mocker.patch('notifications_utils.recipients.validate_email_address')
+    recipients._column_plan = None
+
+    assert [row.get('email address').error for row in recipients.rows] == [None, 'Not a valid email address']
+    assert validate_mock.called is False
+
+
+def test_recipient_csv_only_revalidates_rows_which_have_changed(mocker):
+    template = SMSMessageTemplate({'content': 'Hello ((name))', 'template_type': 'sms'})
+    first_upload = RecipientCSV(
+        "phone number,name\n6502532222,Jo\n12345,Bob\n6502532223,\n",
+        template_type='sms',
+        placeholders=['name'],
+        template=template,
+    )
+    previous_validation = RowValidationResults.from_json(first_upload.validation_results.to_json())
+    assert len(previous_validation) == 3
+
+    get_error_mock = mocker.spy(RecipientCSV, '_get_error_for_field')
+    second_upload = RecipientCSV(
+        "phone number,name\n6502532222,Jo\n12345,Bob\n6502532223,Al\n",
+        template_type='sms',
+        placeholders=['name'],
+        template=template,
+        previous_validation=previous_validation,
+    )
+
+    assert [row.index for row in second_upload.rows_with_bad_recipients] == [1]
+    assert [row.index for row in second_upload.rows_with_errors] == [1]
+    assert not list(second_upload.rows_with_missing_data)
+    assert second_upload.rows[0].personalisation == {'phonenumber': '6502532222', 'name': 'Jo'}
+    assert second_upload.rows[1].get('phone number').error == 'Not a valid local number'
+    assert [call[0][1:] for call in get_error_mock.call_args_list] == [
+        ('phone number', '6502532223'),
+        ('name', 'Al'),
+    ]
+
+
+def test_recipient_csv_revalidates_every_row_if_template_changes(mocker):
+    first_upload = RecipientCSV("phone number\n6502532222\n", template_type='sms')
+    get_error_mock = mocker.spy(RecipientCSV, '_get_error_for_field')
+
+    second_upload = RecipientCSV(
+        "phone number\n6502532222\n",
+        template_type='sms',
+        placeholders=['name'],
+        previous_validation=first_upload.validation_results,
+    )
+
+    assert second_upload.has_errors
+    assert second_upload.missing_column_headers == {'name'}
+    assert get_error_mock.call_count == 1
+
+
+@pytest.mark.parametrize('first_headers, second_headers', [
+    ('phone number,name', 'Phone Number,name'),
+    ('phone number,name', 'name,phone number'),
+    ('phone number,name', 'phone number,phone_number,name'),
+    ('phone number,name', 'phone number,name,name'),
+])
+def test_recipient_csv_validation_fingerprint_includes_column_headers(first_headers, second_headers):
+    first_upload = RecipientCSV(first_headers + "\n6502532222,Jo\n", template_type='sms', placeholders=['name'])
+    second_upload = RecipientCSV(second_headers + "\n6502532222,Jo\n", template_type='sms', placeholders=['name'])
+
+    assert first_upload.validation_fingerprint != second_upload.validation_fingerprint
+
+
+def test_recipient_csv_revalidates_every_row_if_recipient_column_is_duplicated(mocker):
+    first_upload = RecipientCSV("phone number,name\n6502532222,Jo\n", template_type='sms', placeholders=['name'])
+    get_error_mock = mocker.spy(RecipientCSV, '_get_error_for_field')
+
+    second_upload = RecipientCSV(
+        "phone number,phone_number,name\n6502532222,6502532222,Jo\n",
+        template_type='sms',
+        placeholders=['name'],
+        previous_validation=first_upload.validation_results,
+    )
+
+    assert second_upload.has_errors
+    assert second_upload.duplicate_recipient_column_headers == OrderedSet(['phone number', 'phone_number'])
+    assert get_error_mock.called is True
+
+
+def test_row_validation_results_can_be_stored_in_redis():
+    redis_client = Mock()
+    results = RecipientCSV(
+        "email address\na@b.com\nnot an email\n", template_type='email'
+    ).validation_results
+
+    results.save(redis_client, 'recipient-csv-validation-1234', 3600)
+
+    redis_client.set.assert_called_once_with(
+        'recipient-csv-validation-1234', results.to_json(), ex=3600
+    )
+    redis_client.get.return_value = redis_client.set.call_args[0][1].encode('utf-8')
+    assert RowValidationResults.load(redis_client, 'recipient-csv-validation-1234').results == results.results
+
+    redis_client.get.return_value = None
+    assert len(RowValidationResults.load(redis_client, 'recipient-csv-validation-1234')) == 0
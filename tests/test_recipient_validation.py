@@ -1,22 +1,37 @@
+import phonenumbers
 import pytest
+import random
 
 from functools import partial
 
+from notifications_utils import international_billing_rates
+from notifications_utils.template import SMSMessageTemplate
 from notifications_utils.recipients import (
     validate_phone_number,
     validate_and_format_phone_number,
     InvalidPhoneError,
     validate_email_address,
+    validate_email_addresses,
+    validate_and_format_email_address,
+    is_valid_email_hostname,
+    EmailValidationResult,
+    email_hostname_cache,
     InvalidEmailError,
     allowed_to_send_to,
     InvalidAddressError,
     validate_recipient,
     is_local_phone_number,
     normalise_phone_number,
+    validate_local_phone_number,
     international_phone_info,
     get_international_phone_info,
+    get_billable_units_for_prefix,
+    get_country_prefix,
+    estimate_sms_billing,
     format_phone_number_human_readable,
     format_recipient,
+    normalise_safelist,
+    recipient_cache,
     try_validate_and_format_phone_number
 )
 
@@ -185,6 +200,98 @@ def test_get_international_info(phone_number, expected_info):
     assert get_international_phone_info(phone_number) == expected_info
 
 
+@pytest.mark.parametrize('phone_number', [
+    '+447900900123',
+    '+201212341234',
+    '+79587714230',
+    '+2302086859',
+    '+12025550104',
+    '+12423570000',
+    '1-202-555-0104',
+    '+20-12-1234-1234',
+])
+def test_get_country_prefix(phone_number):
+    assert get_country_prefix(phone_number) == get_international_phone_info(phone_number).country_prefix
+
+
+@pytest.mark.parametrize('phone_number', [
+    '+447900900123',
+    '+201212341234',
+    '+79587714230',
+    '+2302086859',
+    '+12025550104',
+    '+12423570000',
+])
+def test_lookup_bills_numbers_the_same_as_get_international_phone_info(phone_number):
+    info = get_international_phone_info(phone_number)
+    rate = international_billing_rates.lookup(phone_number)
+
+    assert (rate.prefix, rate.billable_units) == (info.country_prefix, info.billable_units)
+    assert get_billable_units_for_prefix(rate.prefix) == rate.billable_units
+
+
+@pytest.mark.parametrize('phone_number', [
+    '+19999999999',
+    '+1000000',
+    '+9999999',
+    '+21 4321 0987',
+])
+def test_get_country_prefix_raises_for_invalid_numbers(phone_number):
+    with pytest.raises(InvalidPhoneError) as error:
+        get_country_prefix(phone_number)
+    assert str(error.value) == 'Not a valid international number'
+
+
+def test_estimate_sms_billing():
+    template = SMSMessageTemplate({'content': 'Hello ((name)), your reference is ((ref))'}, prefix='Service')
+
+    estimate = estimate_sms_billing(
+        template.compiled_content,
+        {'Name': ['Jo', 'Ŵyn', 'a ' * 100, 'Jo'], 'ref': ['1', '2', '3', '4']},
+        ['+12025550104', '+447900900123', '+201212341234', 'not a number'],
+    )
+
+    assert estimate.fragment_counts == [1, 1, 2, 1]
+    assert estimate.country_prefixes == ['1', '44', '20', None]
+    assert estimate.billable_units == [1, 1, 6, None]
+    assert estimate.total_fragments == 5
+    assert estimate.total_billable_units == 8
+
+
+def test_estimate_sms_billing_doesnt_bill_invalid_numbers():
+    template = SMSMessageTemplate({'content': 'Hello'})
+
+    estimate = estimate_sms_billing(
+        template.compiled_content, {}, ['not a number', '+21 4321 0987', '+999123456', '+12025550104'],
+    )
+
+    assert estimate.country_prefixes == [None, None, None, '1']
+    assert estimate.billable_units == [None, None, None, 1]
+    assert estimate.total_billable_units == 1
+
+
+def test_estimate_sms_billing_doesnt_bill_invalid_numbers_in_e164_format():
+    template = SMSMessageTemplate({'content': 'Hello'})
+
+    estimate = estimate_sms_billing(template.compiled_content, {}, ['+10000000000', '+1 000 000 0000'])
+
+    assert estimate.country_prefixes == [None, None]
+    assert estimate.billable_units == [None, None]
+
+
+def test_estimate_sms_billing_parses_each_distinct_number_once(mocker):
+    template = SMSMessageTemplate({'content': 'Hello'})
+    phone_numbers = ['+12025550104', '+12423570000', '+447900900123', '+2302086859'] * 3
+    expected_info = [get_international_phone_info(number) for number in phone_numbers]
+    parse_mock = mocker.spy(phonenumbers, 'parse')
+
+    estimate = estimate_sms_billing(template.compiled_content, {}, phone_numbers)
+
+    assert parse_mock.call_count == 4
+    assert estimate.country_prefixes == [info.country_prefix for info in expected_info]
+    assert estimate.billable_units == [info.billable_units for info in expected_info]
+
+
 @pytest.mark.parametrize('phone_number', [
     'abcd',
     '079OO900123',
@@ -287,6 +394,72 @@ def test_phone_number_rejects_invalid_international_values(validator, phone_numb
     assert error_message == str(e.value)
 
 
+def _validate_phone_number_by_matching(number, international):
+    # how validate_phone_number used to work, scanning each number with PhoneNumberMatcher
+    if ';' in number:
+        raise InvalidPhoneError('Not a valid number')
+    if (not international) or is_local_phone_number(number):
+        return validate_local_phone_number(number)
+    number = normalise_phone_number(number)
+    if number is False:
+        raise InvalidPhoneError('Not a valid international number')
+    if len(number) < 8:
+        raise InvalidPhoneError('Not enough digits')
+    return number
+
+
+def _result_or_error(validator, *args, **kwargs):
+    try:
+        return validator(*args, **kwargs)
+    except InvalidPhoneError as e:
+        return str(e)
+
+
+_random = random.Random(1234)
+
+
+@pytest.mark.parametrize('phone_number', (
+    valid_phone_numbers +
+    [phone_number for phone_number, _ in invalid_local_phone_numbers + invalid_phone_numbers] +
+    ['+447900900123', '447900900123', '011447900900123', '+16502532222', '+1650253222', '+12345678'] +
+    ['+44 7900 900123', '+44-7900-900123', '(+44) 7900 900123', '011 44 7900 900123', '+1 (650) 253-2222'] +
+    [_random.choice(['', '+', '1', '+1']) + str(_random.randrange(10 ** 6, 10 ** 15)) for _ in range(200)]
+))
+@pytest.mark.parametrize('international', [True, False])
+def test_validate_phone_number_matches_validating_by_matching(phone_number, international):
+    assert _result_or_error(
+        validate_phone_number, phone_number, international=international
+    ) == _result_or_error(
+        _validate_phone_number_by_matching, phone_number, international=international
+    )
+
+
+@pytest.mark.parametrize('phone_number, international', [
+    ('6502532222', False),
+    ('16502532222', False),
+    ('+16502532222', False),
+    ('+447900900123', True),
+])
+def test_validate_phone_number_parses_well_formed_numbers_directly(mocker, phone_number, international):
+    matcher = mocker.patch('phonenumbers.PhoneNumberMatcher')
+    parse = mocker.spy(phonenumbers, 'parse')
+    validate_phone_number(phone_number, international=international)
+    assert matcher.called is False
+    assert parse.call_count == 1
+
+
+@pytest.mark.parametrize('phone_number', [
+    '+44 7900 900123',
+    '447900900123',
+    '011 44 7900 900123',
+    '(650) 253-2222',
+])
+def test_validate_phone_number_scans_other_numbers_once(mocker, phone_number):
+    matcher = mocker.spy(phonenumbers, 'PhoneNumberMatcher')
+    _result_or_error(validate_phone_number, phone_number, international=True)
+    assert matcher.call_count == 1
+
+
 @pytest.mark.parametrize("email_address", valid_email_addresses)
 def test_validate_email_address_accepts_valid(email_address):
     try:
@@ -312,6 +485,96 @@ def test_validate_email_address_raises_for_invalid(email_address):
     assert str(e.value) == 'Not a valid email address'
 
 
+def test_validate_email_addresses_matches_validating_each_address():
+    email_addresses = [
+        *valid_email_addresses, *invalid_email_addresses, ' email@domain.com ', 'email@Domain.COM',
+    ]
+
+    assert validate_email_addresses(email_addresses) == [
+        _validation_result(email_address) for email_address in email_addresses
+    ]
+
+
+def test_validate_email_addresses_formats_addresses():
+    assert validate_email_addresses([' Email@Domain.COM ', 'email@domain.com']) == [
+        EmailValidationResult('email@domain.com', None),
+        EmailValidationResult('email@domain.com', None),
+    ]
+
+
+def _validation_result(email_address):
+    try:
+        return EmailValidationResult(validate_and_format_email_address(email_address), None)
+    except InvalidEmailError as e:
+        return EmailValidationResult(None, str(e))
+
+
+def test_validate_email_addresses_checks_each_hostname_once(mocker):
+    email_hostname_cache.clear()
+    check_hostname = mocker.patch(
+        'notifications_utils.recipients.is_valid_email_hostname', side_effect=is_valid_email_hostname,
+    )
+
+    results = validate_email_addresses(
+        ['person.{}@{}'.format(index, domain) for index in range(100) for domain in ('example.com', 'example..com')]
+    )
+
+    assert [result.error for result in results[:2]] == [None, 'Not a valid email address']
+    assert check_hostname.call_args_list == [mocker.call('example.com')]
+
+
+def test_validate_email_address_caches_hostnames(mocker):
+    email_hostname_cache.configure(maxsize=2)
+    email_hostname_cache.report_stats(mocker.Mock())
+    check_hostname = mocker.patch(
+        'notifications_utils.recipients.is_valid_email_hostname', side_effect=is_valid_email_hostname,
+    )
+    statsd_client = mocker.Mock()
+
+    try:
+        for email_address in ('jo@example.com', 'sam@example.com', 'alex@example.org', 'chris@example.com'):
+            validate_email_address(email_address)
+        with pytest.raises(InvalidEmailError):
+            validate_email_address('jo@example')
+        with pytest.raises(InvalidEmailError):
+            validate_email_address('sam@example')
+
+        assert check_hostname.call_args_list == [
+            mocker.call('example.com'), mocker.call('example.org'), mocker.call('example'),
+        ]
+        assert len(email_hostname_cache) == 2
+
+        email_hostname_cache.report_stats(statsd_client)
+        assert statsd_client.incr.call_args_list == [
+            mocker.call('email-hostname-cache.hit', 3),
+            mocker.call('email-hostname-cache.miss', 3),
+        ]
+    finally:
+        email_hostname_cache.configure(maxsize=1000)
+
+
+@pytest.mark.parametrize('hostname', [
+    'example.com', 'EXAMPLE.COM', 'example.com.', 'a' * 64 + '.com', 'a' * 63 + '.com', 'example', '-example.com',
+    'xn--r8jz45g.xn--zckzah', 'xn--.com', 'exa_mple.com', 'example.c', 'example.123', '.'.join(['a'] * 130),
+])
+def test_is_valid_email_hostname_doesnt_need_idna_codec_for_ascii(hostname):
+    try:
+        expected = is_valid_email_hostname(hostname.encode('idna').decode('ascii'))
+    except UnicodeError:
+        expected = False
+    assert is_valid_email_hostname(hostname) is expected
+
+
+@pytest.mark.parametrize('hostname, expected', [
+    ('例え.テスト', True),
+    ('ëxample.com', True),
+    ('例え..テスト', False),
+    ('\u0080.com', False),
+])
+def test_is_valid_email_hostname_uses_idna_codec_for_non_ascii(hostname, expected):
+    assert is_valid_email_hostname(hostname) is expected
+
+
 @pytest.mark.parametrize('column', [
     'address_line_1', 'AddressLine1',
     'postcode', 'Postcode'
@@ -384,6 +647,29 @@ def test_validates_against_safelist_of_email_addresses(email_address):
     assert not allowed_to_send_to(email_address, ['very_special_and_unique@example.com'])
 
 
+@pytest.mark.parametrize("recipient, expected", [
+    ('650 253 2222', True),
+    ('+1 650-253-2222', True),
+    ('TEST@example.com', True),
+    ('650 253 2223', False),
+    ('other@example.com', False),
+])
+def test_validates_against_normalised_safelist(recipient, expected):
+    safelist = normalise_safelist(['6502532222', 'test@EXAMPLE.com'])
+    assert safelist == frozenset({'+16502532222', 'test@example.com'})
+    assert allowed_to_send_to(recipient, safelist) is expected
+
+
+def test_format_recipient_caches_formatted_values():
+    recipient_cache.clear()
+    recipient_cache.hits = recipient_cache.misses = 0
+
+    format_recipient('650 253 2222')
+    format_recipient('650 253 2222')
+
+    assert (recipient_cache.hits, recipient_cache.misses) == (1, 1)
+
+
 @pytest.mark.parametrize("phone_number, expected_formatted", [
     ('+20-12-1234-1234', '+20 121 234 1234'),  # Egypt
     ('+7 499 1231212', '+7 499 123-12-12'),  # Moscow (Russia)
@@ -76,6 +76,33 @@ def test_encode_string(content, expected):
     assert SanitiseASCII.encode(content) == expected
 
 
+@pytest.mark.parametrize('cls', [SanitiseSMS, SanitiseASCII])
+def test_encode_matches_encoding_each_character(cls):
+    characters = [chr(codepoint) for codepoint in range(0x3000)] + ['😬', '🐮', '\U00010000']
+    content = ''.join(characters)
+
+    assert cls.encode(content) == ''.join(cls.encode_char(char) for char in characters)
+
+
+@pytest.mark.parametrize('content', [
+    '',
+    'The quick brown fox jumps over the lazy dog',
+    'Ŵêlsh chârâctêrs ârê cômpâtîblê wîth SanitiseSMS',
+])
+def test_encode_doesnt_look_up_allowed_characters(mocker, content):
+    encode_char = mocker.patch.object(SanitiseSMS, 'encode_char')
+
+    assert SanitiseSMS.encode(content) == content
+    assert encode_char.called is False
+
+
+def test_translation_tables_arent_shared_between_classes():
+    assert SanitiseSMS.get_translation_table() is SanitiseSMS.get_translation_table()
+    assert SanitiseSMS.get_translation_table() is not SanitiseASCII.get_translation_table()
+    assert SanitiseSMS.encode('\n€') == '\n€'
+    assert SanitiseASCII.encode('\n€') == '??'
+
+
 @pytest.mark.parametrize('content, cls, expected', [
     ('The quick brown fox jumps over the lazy dog', SanitiseSMS, set()),
     ('The “quick” brown fox has some downgradable characters\xa0', SanitiseSMS, set()),
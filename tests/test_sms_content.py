@@ -0,0 +1,113 @@
+import random
+
+import pytest
+
+from notifications_utils import SMS_CHAR_COUNT_LIMIT
+from notifications_utils.sms_content import CompiledSMSContent
+from notifications_utils.template import SMSMessageTemplate
+
+tricky_characters = [
+    'a', 'B', '1', ' ', '  ', '\t', '\n', '\r\n', '\r', '\u2028', '.', ',', ' .',
+    '\u2026', 'é', 'ŵ', '€', '\u00a0', '[', '?',
+]
+
+
+def _random_text(rng, max_length=6):
+    return ''.join(rng.choice(tricky_characters) for _ in range(rng.randint(0, max_length)))
+
+
+def _random_value(rng):
+    return rng.choice([
+        None,
+        '',
+        'yes',
+        'no',
+        _random_text(rng),
+        _random_text(rng),
+        [_random_text(rng), None, _random_text(rng)],
+        [None],
+        12,
+    ])
+
+
+def _random_template(rng):
+    pieces = []
+    for _ in range(rng.randint(0, 4)):
+        pieces.append(_random_text(rng))
+        name = rng.choice(['name', 'Name', 'town', 'thing'])
+        if rng.random() < 0.2:
+            pieces.append('(({}??{}))'.format(name, _random_text(rng)))
+        else:
+            pieces.append('(({}))'.format(name))
+    pieces.append(_random_text(rng))
+    return ''.join(pieces)
+
+
+@pytest.mark.parametrize('content, prefix, values', [
+    ('Hello ((name))', None, {'name': 'Jo'}),
+    ('Hello ((name)) .', None, {'name': 'Jo '}),
+    ('Hello ((name)), how are you?', 'Service', {'name': ''}),
+    ('  ((name))\r\n((town))  ', None, {'NAME': '\r', 'town': '\n'}),
+    ('((name??Hello)) there', None, {'name': 'yes'}),
+    ('((name??Hello)) there', None, {'name': None}),
+    ('((name))', None, {'name': ['a', 'b', 'c']}),
+    ('((name))', 'Service', {}),
+    ('Hello', None, {'name': 'Jo'}),
+])
+def test_content_count_matches_template(content, prefix, values):
+    template = SMSMessageTemplate({'content': content, 'template_type': 'sms'}, values, prefix=prefix)
+    assert CompiledSMSContent(content, prefix).content_count(values) == template.content_count
+
+
+def test_content_count_matches_template_for_random_content_and_values():
+    rng = random.Random(1234)
+    for _ in range(2000):
+        content = _random_template(rng)
+        prefix = rng.choice([None, 'Service', ' Service. '])
+        values = {
+            key: _random_value(rng) for key in rng.sample(['name', 'TOWN', 'thing', 'other'], rng.randint(0, 4))
+        }
+        template = SMSMessageTemplate({'content': content, 'template_type': 'sms'}, values, prefix=prefix)
+        assert CompiledSMSContent(content, prefix).content_count(values) == template.content_count, (
+            content, prefix, values
+        )
+
+
+def test_content_counts_match_counting_each_row():
+    rng = random.Random(1234)
+    for _ in range(200):
+        content = _random_template(rng)
+        prefix = rng.choice([None, 'Service', ' Service. '])
+        compiled = CompiledSMSContent(content, prefix)
+        row_count = rng.randint(0, 20)
+        columns = {
+            key: [_random_value(rng) for _ in range(row_count)]
+            for key in rng.sample(['name', 'TOWN', 'thing', 'other'], rng.randint(0, 4))
+        }
+        rows = [{key: values[index] for key, values in columns.items()} for index in range(row_count)]
+
+        counts, unicode = compiled.content_counts(columns, row_count)
+
+        assert counts == [compiled.content_count(row) for row in rows], (content, prefix, columns)
+        assert unicode == [
+            SMSMessageTemplate({'content': content, 'template_type': 'sms'}, row, prefix=prefix).sms_metrics.is_unicode
+            for row in rows
+        ], (content, prefix, columns)
+
+
+def test_is_message_too_long_for_doesnt_change_template():
+    template = SMSMessageTemplate({'content': '((name))', 'template_type': 'sms'})
+
+    assert template.is_message_too_long_for({'name': 'a' * (SMS_CHAR_COUNT_LIMIT + 1)}) is True
+    assert template.is_message_too_long_for({'name': 'a' * SMS_CHAR_COUNT_LIMIT}) is False
+    assert template.values == {}
+
+
+def test_compiled_content_is_reused_until_template_changes():
+    template = SMSMessageTemplate({'content': '((name))', 'template_type': 'sms'}, prefix='Service')
+    compiled_content = template.compiled_content
+    assert template.compiled_content is compiled_content
+
+    template.show_prefix = False
+    assert template.compiled_content is not compiled_content
+    assert template.compiled_content.content_count({'name': 'Jo'}) == 2
@@ -0,0 +1,52 @@
+import os
+
+from jinja2 import Environment
+
+from notifications_utils.template_environments import TemplateEnvironments, get_template_env
+from notifications_utils.template import HTMLEmailTemplate, SMSPreviewTemplate
+
+package_templates = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'notifications_utils', 'jinja_templates')
+
+
+def test_templates_share_an_environment_for_each_directory():
+    first = SMSPreviewTemplate({'content': 'foo', 'template_type': 'sms'})
+    second = HTMLEmailTemplate({'content': 'foo', 'subject': 'bar'})
+    third = HTMLEmailTemplate(
+        {'content': 'foo', 'subject': 'bar'}, jinja_path=os.path.join(package_templates, '..', 'template.py')
+    )
+
+    assert first.template_env is second.template_env is third.template_env is get_template_env()
+
+
+def test_environment_doesnt_touch_the_disk_after_precompiling(mocker):
+    environments = TemplateEnvironments()
+    environments.precompile(package_templates)
+    getmtime_mock = mocker.patch('os.path.getmtime')
+    open_mock = mocker.patch('builtins.open')
+
+    environments.get(package_templates).get_template('email_template.jinja2').render({'body': 'foo'})
+
+    assert getmtime_mock.called is False
+    assert open_mock.called is False
+
+
+def test_compiled_templates_are_reused_by_new_environments(mocker):
+    environments = TemplateEnvironments()
+    environments.get(package_templates).get_template('sms_preview_template.jinja2')
+    compile_mock = mocker.patch.object(Environment, 'compile', side_effect=Environment.compile, autospec=True)
+
+    environments._environments.clear()
+    environments.get(package_templates).get_template('sms_preview_template.jinja2')
+
+    assert compile_mock.called is False
+
+
+def test_compiled_templates_can_be_stored_on_disk(tmpdir):
+    environments = TemplateEnvironments()
+    environments.configure(bytecode_directory=str(tmpdir))
+
+    environments.precompile(package_templates)
+
+    assert len(tmpdir.listdir()) == len(
+        environments.get(package_templates).list_templates(extensions=['jinja2'])
+    )
@@ -1,6 +1,8 @@
 import datetime
 from time import process_time
 import os
+import random
+import mistune
 import pytest
 
 from functools import partial
@@ -20,6 +22,12 @@ from notifications_utils.template import (
     WithSubjectTemplate,
     EmailPreviewTemplate,
     LetterPrintTemplate,
+    CompiledHTMLEmailBody,
+    RenderedMessage,
+    do_nice_typography,
+    do_nice_typography_reference,
+    get_html_email_body,
+    render_many,
 )
 
 
@@ -1043,7 +1051,10 @@ def test_templates_remove_whitespace_before_punctuation(
     ]),
 ])
 @mock.patch('notifications_utils.template.make_quotes_smart', side_effect=lambda x: x)
-@mock.patch('notifications_utils.template.replace_hyphens_with_en_dashes', side_effect=lambda x: x)
+@mock.patch(
+    'notifications_utils.template.replace_hyphens_and_remove_smart_quotes_from_email_addresses',
+    side_effect=lambda x: x,
+)
 def test_templates_make_quotes_smart_and_dashes_en(
     mock_en_dash_replacement,
     mock_smart_quotes,
@@ -2056,3 +2067,222 @@ def test_image_class_applied_to_logo(template_class, filename, expected_html_cla
 def test_image_not_present_if_no_logo(template_class):
     # can't test that the html doesn't move in utils - tested in template preview instead
     assert '<img' not in str(template_class({'content': 'Foo', 'subject': 'Subject'}, logo_file_name=None))
+
+
+@pytest.mark.parametrize('kind, template_class, kwargs', [
+    ('sms', SMSMessageTemplate, {'prefix': 'Service'}),
+    ('email', HTMLEmailTemplate, {'brand_name': 'Brand', 'fip_banner_english': False}),
+    ('plain_text_email', PlainTextEmailTemplate, {}),
+])
+def test_render_many_matches_rendering_each_template(kind, template_class, kwargs):
+    template = {'content': 'Hello ((name)),\n\n* ((things))\n\n((show??Shown))', 'subject': 'Hi ((name))'}
+    values_list = [
+        {'name': 'Jo', 'things': ['a', 'b'], 'show': 'yes'},
+        {'NAME': 'Chris', 'things': 'c', 'show': 'no'},
+        {'name': None},
+        None,
+    ]
+
+    rendered = list(render_many(template, values_list, kind=kind, **kwargs))
+
+    for message, values in zip(rendered, values_list):
+        expected = template_class(template, values, **kwargs)
+        assert message == RenderedMessage(
+            body=str(expected),
+            subject=getattr(expected, 'subject', None),
+            preheader=getattr(expected, 'preheader', None),
+        )
+
+
+def test_render_many_renders_each_set_of_placeholder_values_once(mocker):
+    str_mock = mocker.patch.object(SMSMessageTemplate, '__str__', return_value='rendered')
+    values_list = [
+        {'name': 'Jo', 'phone number': '6502532222'},
+        {'Name': 'Jo', 'phone number': '6502532223'},
+        {'name': 'Chris'},
+        {'name': 'Jo'},
+    ]
+
+    rendered = list(render_many({'content': 'Hi ((name))', 'template_type': 'sms'}, values_list))
+
+    assert len(rendered) == 4
+    assert str_mock.call_count == 2
+
+
+def test_render_many_doesnt_render_templates_without_placeholders_more_than_once(mocker):
+    str_mock = mocker.patch.object(PlainTextEmailTemplate, '__str__', return_value='rendered')
+
+    rendered = render_many(
+        {'content': 'Hello', 'subject': 'Hi'}, ({'email address': str(i)} for i in range(1000)), kind='plain_text_email'
+    )
+
+    assert {message.body for message in rendered} == {'rendered'}
+    assert str_mock.call_count == 1
+
+
+def test_render_many_raises_for_unknown_kind():
+    with pytest.raises(TypeError):
+        next(render_many({'content': 'Hello'}, [{}], kind='letter'))
+
+
+@pytest.mark.parametrize('content, values', [
+    ('Hello ((name)),\n\nYour reference is **((ref))**.', {'name': 'Jo', 'ref': '12345'}),
+    ('((name)) paid £((amount)) at ((time))', {'name': 'Jean-Luc', 'amount': '1,000.00', 'time': '10:30'}),
+    ('((number)). Item', {'number': '1'}),
+    ('((number)). Item', {'number': 'One'}),
+    ('See https://example.com/((path))', {'path': 'a b'}),
+    ('[link](((url)))', {'url': 'https://example.com'}),
+    ('GOV.((tld))', {'tld': 'UK'}),
+    ('* ((things))', {'things': ['a', 'b']}),
+    ('((show??Shown))', {'show': 'yes'}),
+    ('Hello ((name))', {'name': '*Jo*'}),
+    ('Hello ((name))', {}),
+    ('((a))\t((b))', {'a': 'x', 'b': 'y'}),
+    ('Pay _now_((amount))', {'amount': '$5'}),
+    ('Pay _now_((amount))', {'amount': '£5'}),
+    ('Pay *now*((amount))', {'amount': '£5'}),
+    ('Total due _today_((amount)) thanks', {'amount': '$5'}),
+    ('Total due _today_((amount)) thanks', {'amount': '5'}),
+    ('((amount))_today_', {'amount': '£5'}),
+    ('Go to ((x))://www.gov.uk', {'x': 'https'}),
+    ('See [((x))]\n\n[ref]: https://example.com', {'x': 'ref'}),
+    ('See [((x))][]\n\n[ref]: https://example.com', {'x': 'ref'}),
+    ('See [link][((x))]\n\n[ref]: https://example.com', {'x': 'ref'}),
+    ('See [the ((x))]\n\n[the ref]: https://example.com', {'x': 'ref'}),
+    ('- ((amount))', {'amount': '3.50'}),
+    ('* ((amount))\n* other', {'amount': '3.50'}),
+    ('1. ((amount))', {'amount': '3.50'}),
+    ('^ ((x))', {'x': '10.5'}),
+])
+def test_compiled_html_email_body_matches_full_rendering(content, values):
+    assert CompiledHTMLEmailBody(content).render(values) == get_html_email_body(content, values)
+
+
+def test_compiled_html_email_body_matches_full_rendering_for_random_content():
+    static = [
+        '\n', '\n\n', '* ', '1. ', '# ', '**', '_', '"', "'", ' ', '.', ',', '. ', 'GOV', '.UK', '(', ')', '[', '](',
+        'https://example.com/', '\n---\n', '> ', '-', ' - ', 'word', '2', '@example.com', '<b>', '&', '   ', ':', '...',
+    ]
+    values = [
+        'Jo', 'Jean-Luc', '£1,000.00', '10:30', '1', 'UK', 'a b', "O'Brien", '*x*', '', None, ['a', 'b'], '1.',
+        'x\ny', 'https://a.com', ' a', 'Émilie', '2020-01-01', 'a_b', '<i>', '&', '90s', 'GOV.UK',
+        '$5', '£5', '€10.50', '3.50', '10.5',
+    ]
+    rng = random.Random(1234)
+    for _ in range(500):
+        content = ''.join(
+            ''.join(rng.choice(static) for _ in range(rng.randint(0, 3))) + rng.choice(['((a))', '((b))', ''])
+            for _ in range(rng.randint(1, 6))
+        )
+        personalisation = {'a': rng.choice(values), 'b': rng.choice(values)}
+        assert CompiledHTMLEmailBody(content).render(personalisation) == get_html_email_body(
+            content, personalisation
+        ), (content, personalisation)
+
+
+def test_compiled_html_email_body_only_renders_markdown_once_for_simple_values(mocker):
+    compiled = CompiledHTMLEmailBody('# Hello ((name))\n\n' + 'Some static text. ' * 100 + '\n\nRef: ((ref))')
+    markdown_mock = mocker.patch('notifications_utils.template.notify_email_markdown')
+
+    bodies = [compiled.render({'name': name, 'ref': index}) for index, name in enumerate(('Jo', 'Chris', 'Sam'))]
+
+    assert markdown_mock.called is False
+    assert 'Hello Chris</h2>' in bodies[1]
+    assert 'Ref: 2</p>' in bodies[2]
+
+
+def test_render_many_only_parses_email_markdown_when_compiling_the_body(mocker):
+    template = {'content': '# Hello ((name))\n\n' + 'Some static text. ' * 100, 'subject': 'Hi ((name))'}
+    values_list = [{'name': name} for name in ('Alex', 'Sam', 'Robin')]
+    preprocessing = mocker.spy(mistune, 'preprocessing')
+
+    rendered = list(render_many(template, values_list, kind='email'))
+
+    assert preprocessing.call_count == 2
+    for message, values in zip(rendered, values_list):
+        expected = HTMLEmailTemplate(template, values)
+        assert message == RenderedMessage(body=str(expected), subject=expected.subject, preheader=expected.preheader)
+
+
+@pytest.mark.parametrize('content, values', [
+    ('Hello ((name)),\n\nYour reference is **((ref))**.', {'name': 'Jo', 'ref': '12345'}),
+    ('# ((name))\n\n' + 'Some static text. ' * 50, {'name': 'Jean-Luc'}),
+    ('[link](https://example.com) for ((name))', {'name': 'Jo'}),
+    ('Hello ((name))', {'name': '*Jo*'}),
+])
+def test_compiled_html_email_body_matches_full_preheader(content, values):
+    template = HTMLEmailTemplate({'content': content, 'subject': 'subject'}, values)
+    compiled = CompiledHTMLEmailBody(content).render_with_preheader(values)
+
+    if compiled:
+        assert template._shorten_preheader(compiled[1]) == template.preheader
+    assert template._body_and_preheader() == HTMLEmailTemplate(
+        {'content': content, 'subject': 'subject'}, values, compile_body=True,
+    )._body_and_preheader()
+
+
+@mock.patch('notifications_utils.template.HTMLEmailTemplate.jinja_template.render', return_value='mocked')
+def test_html_email_template_can_use_compiled_body(mock_jinja_template):
+    template = {'content': 'Hello ((name))', 'subject': 'subject'}
+
+    str(HTMLEmailTemplate(template, {'name': 'Jo'}, compile_body=True))
+    str(HTMLEmailTemplate(template, {'name': 'Jo'}))
+
+    assert mock_jinja_template.call_args_list[0] == mock_jinja_template.call_args_list[1]
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('"Hello" - it’s me', '“Hello” – it’s me'),
+    ("Don't email first.o'last@example.com", "Don’t email first.o'last@example.com"),
+    ('first.o’last@example.com , or', "first.o'last@example.com, or"),
+    ('\\"escaped\\" &#8211; &#8216;entities&#8217;', '&#34;escaped&#34; – ‘entities’'),
+    ('<a href="https://example.com">"link"</a> "text"', '<a href="https://example.com">"link"</a> “text”'),
+    (
+        '<p style="font-family: Helvetica , Arial">\'Hello\' - world</p>',
+        '<p style="font-family: Helvetica, Arial">‘Hello’ – world</p>',
+    ),
+    ('It\'s the \'90s -- "really" .', 'It’s the ‘90s – “really”.'),
+])
+def test_nice_typography_with_quotes(value, expected):
+    assert do_nice_typography(value) == expected
+
+
+@pytest.mark.parametrize('value', [
+    '',
+    'Hello world',
+    'Hello , world - again',
+    '"Hello" - it’s me',
+    "Don't email first.o'last@example.com",
+    'first.o’last@example.com , or',
+    "'a@example.com' 'b@example.com'\n'c@example.com'",
+    '1990 -- 2000 --- 2010 ---- 2020',
+    '<p style="margin: 0 0 20px 0; font-family: Helvetica , Arial">Hello - world</p>',
+])
+def test_nice_typography_matches_reference(value):
+    assert do_nice_typography(value) == do_nice_typography_reference(value)
+
+
+def test_nice_typography_matches_reference_for_random_text():
+    pieces = [
+        'a', 'word', ' ', '  ', '\t', '\n', ',', '.', '-', '–', '—', '--', "'", '"', '‘', '’', '\\', '&#8211;',
+        '@', 'x@example.com', 'o’x@example.com', '<p>', '</p>', '<a href="x">', '</a>', '<!--', '-->', '90s',
+    ]
+    rng = random.Random(1234)
+    for _ in range(5000):
+        value = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        assert do_nice_typography(value) == do_nice_typography_reference(value), value
+
+
+@pytest.mark.parametrize('content, values', [
+    ('Hello ((name))', {'name': 'Jo'}),
+    ('# Title\n\n* one\n* two\n\n^ Inset with a [link](https://example.com)\n\n---\n\n"Quoted" -- text', {}),
+    ('((name)), see https://www.gov.uk/example\n\n1. first\n2. second', {'name': '<b>Jo</b>'}),
+    ('Text ' * 100, {}),
+])
+def test_html_email_template_body_and_preheader_from_one_parse(mocker, content, values):
+    template = {'content': content, 'subject': 'subject'}
+    expected = str(HTMLEmailTemplate(template, values))
+    preprocessing = mocker.spy(mistune, 'preprocessing')
+
+    assert str(HTMLEmailTemplate(template, values, parse_markdown_once=True)) == expected
+    assert preprocessing.call_count == 1